@@ -0,0 +1,166 @@
+"""Measure how long `gg branches`, `gg start`, `gg commit`, `gg cleanup`
+and `gg getback` take in a big synthetic repo (see synthetic.py), the way
+you'd run them, each in its own process. Fully offline: the remotes are
+local bare repos.
+
+Run it with::
+
+    python benchmarks/bench_commands.py --files 200000 --output after.json
+
+and compare two runs with::
+
+    python benchmarks/bench_commands.py --compare before.json after.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import Scenario, git, make_repos, run_gg
+
+
+def get_scenarios(repo, env):
+    def start_setup():
+        git(repo, "checkout", "-q", "main")
+        delete_branch(repo, "benchmark-start")
+
+    def commit_setup():
+        git(repo, "checkout", "-q", "main")
+        delete_branch(repo, "benchmark-commit")
+        run_gg(repo, env, ["start"], "benchmark commit\n")
+        with open(os.path.join(repo, "dir0", "file0.txt"), "a") as f:
+            f.write("changed\n")
+
+    def cleanup_setup():
+        git(repo, "checkout", "-q", "main")
+        git(repo, "branch", "-q", "-f", "cleanup-me", "main~1")
+
+    def getback_setup():
+        git(repo, "checkout", "-q", "-B", "getback-me", "main~1")
+
+    return [
+        Scenario("branches", ["branches"]),
+        Scenario("branches-search", ["branches", "topic-1"]),
+        Scenario("start", ["start"], start_setup, "benchmark start\n"),
+        Scenario("commit", ["commit", "--yes"], commit_setup),
+        Scenario("cleanup", ["cleanup", "cleanup-me"], cleanup_setup),
+        Scenario("getback", ["getback"], getback_setup),
+    ]
+
+
+def delete_branch(repo, name):
+    # If it's there, from the previous run. Locally and on the fork.
+    for command in (["branch", "-q", "-D", name], ["push", "-q", "fork", f":{name}"]):
+        subprocess.run(["git", *command], cwd=repo, capture_output=True)
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        t0 = time.perf_counter()
+        repo = make_repos(
+            tmp_dir,
+            branches=args.branches,
+            remote_branches=args.remote_branches,
+            files=args.files,
+            untracked=args.untracked,
+            depth=args.depth,
+        )
+        print(f"Created the repos in {time.perf_counter() - t0:.1f}s")
+
+        env = dict(os.environ)
+        env["GG_CACHE_DIR"] = os.path.join(tmp_dir, "cache")
+        env["GG_CONFIGFILE"] = os.path.join(tmp_dir, "gg.json")
+        with open(env["GG_CONFIGFILE"], "w") as f:
+            json.dump({"FORK_NAME": "fork", "ORIGIN_NAME": "origin"}, f)
+        # So that building the plugin index isn't in the first measurement
+        run_gg(repo, env, ["--help"])
+
+        results = {}
+        for scenario in get_scenarios(repo, env):
+            if args.only and scenario.name not in args.only:
+                continue
+            times = []
+            for _ in range(args.repeat):
+                if scenario.setup:
+                    scenario.setup()
+                t0 = time.perf_counter()
+                run_gg(repo, env, scenario.argv, scenario.stdin)
+                times.append(time.perf_counter() - t0)
+            results[scenario.name] = {
+                "times": times,
+                "min": min(times),
+                "median": statistics.median(times),
+            }
+            median = results[scenario.name]["median"]
+            print(
+                f"\t{scenario.name:<16} {median * 1000:8.1f}ms"
+                f" (min {min(times) * 1000:.1f}ms)"
+            )
+    return {
+        "date": datetime.datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "git": git(".", "--version").decode("utf-8").strip(),
+        "repo": {
+            "branches": args.branches,
+            "remote_branches": args.remote_branches,
+            "files": args.files,
+            "untracked": args.untracked,
+            "depth": args.depth,
+        },
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def compare(before_file, after_file):
+    with open(before_file) as f:
+        before = json.load(f)
+    with open(after_file) as f:
+        after = json.load(f)
+    if before["repo"] != after["repo"]:
+        print("Note! The repos weren't the same size:", before["repo"], after["repo"])
+    for name, result in after["results"].items():
+        if name not in before["results"]:
+            continue
+        old = before["results"][name]["median"]
+        new = result["median"]
+        print(
+            f"\t{name:<16} {old * 1000:8.1f}ms -> {new * 1000:8.1f}ms "
+            f"({(new - old) / old:+.0%})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--branches", type=int, default=1_000)
+    parser.add_argument("--remote-branches", type=int, default=5_000)
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--untracked", type=int, default=1_000)
+    parser.add_argument("--depth", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Only run these scenarios")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="Compare the results of two earlier runs instead",
+    )
+    args = parser.parse_args()
+    if args.compare:
+        return compare(*args.compare)
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Measure how long the gg commands that talk to GitHub and Bugzilla take,
+and how many requests they make, against a local stand-in for both with
+as much latency as you like (see fake_api.py). Each command is run in its
+own process, the way you'd run it. The first run of each is reported on
+its own, because that's before anything's cached.
+
+Run it with::
+
+    python benchmarks/bench_network.py --latency 0.2 --jitter 0.05
+
+`gg pr` and the search for pull requests in `gg commit` always ask
+api.github.com, so here gg.builtins.github.GITHUB_URL is pointed at the
+stand-in before gg is run.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_api import FakeAPI, make_certificate
+from synthetic import YES, Scenario, git, make_repos
+from synthetic import run_gg as _run_gg
+
+GG = [
+    sys.executable,
+    "-c",
+    "import os; from gg.builtins import github; "
+    "github.GITHUB_URL = os.environ['GG_BENCH_GITHUB_URL']; "
+    "from gg.main import cli; cli()",
+]
+ORIGIN_URL = "https://github.com/bench/project.git"
+
+
+def run_gg(repo, env, argv, stdin=YES):
+    # Failing isn't fatal, because with --failure-rate some are expected
+    return _run_gg(repo, env, argv, stdin, check=False, gg=GG)
+
+
+def get_branch_names(repo):
+    names = git(repo, "for-each-ref", "--format=%(refname:short)", "refs/heads")
+    return set(names.decode("utf-8").split())
+
+
+def get_scenarios(repo, env, url):
+    original = get_branch_names(repo)
+
+    def main_setup():
+        # Delete the branches from the previous run. Locally and on the fork.
+        git(repo, "checkout", "-q", "main")
+        for name in get_branch_names(repo) - original:
+            git(repo, "branch", "-q", "-D", name)
+            subprocess.run(
+                ["git", "push", "-q", "fork", f":{name}"], cwd=repo, capture_output=True
+            )
+
+    def commit_setup():
+        main_setup()
+        run_gg(repo, env, ["start"], "bench commit\n")
+        with open(os.path.join(repo, "dir0", "file0.txt"), "a") as f:
+            f.write("changed\n")
+
+    def pr_setup():
+        commit_setup()
+        run_gg(repo, env, ["commit", "--yes"])
+
+    issue_url = ORIGIN_URL.replace(".git", "/issues/42")
+    bug_url = "https://bugzilla.mozilla.org/show_bug.cgi?id=123456"
+    return [
+        Scenario("github-token", ["github", "--github-url", url, "token", "secret"]),
+        Scenario("bugzilla-login", ["bugzilla", "--bugzilla-url", url, "login", "key"]),
+        Scenario("start-issue-url", ["start", issue_url], main_setup),
+        Scenario("start-bug-url", ["start", bug_url], main_setup),
+        Scenario("start-number", ["start", "42"], main_setup),
+        Scenario("commit", ["commit", "--yes"], commit_setup),
+        Scenario("pr", ["pr"], pr_setup),
+    ]
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server = FakeAPI(
+            *make_certificate(tmp_dir),
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+        ).start()
+        repo = make_repos(
+            tmp_dir, branches=10, remote_branches=10, files=100, untracked=0, depth=10
+        )
+        # Never contacted, but it's where the org and repo are read from
+        git(repo, "remote", "set-url", "origin", ORIGIN_URL)
+
+        env = dict(os.environ)
+        env["GG_BENCH_GITHUB_URL"] = server.url
+        env["REQUESTS_CA_BUNDLE"] = os.path.join(tmp_dir, "cert.pem")
+        env["GG_CACHE_DIR"] = os.path.join(tmp_dir, "cache")
+        env["GG_CONFIGFILE"] = os.path.join(tmp_dir, "gg.json")
+        with open(env["GG_CONFIGFILE"], "w") as f:
+            json.dump(
+                {
+                    "FORK_NAME": "fork",
+                    "ORIGIN_NAME": "origin",
+                    "DEFAULT_BRANCH": "main",
+                    # The same as `gg github token` and `gg bugzilla login`
+                    # would store, so that any scenario can run first
+                    "GITHUB": {
+                        "github_url": server.url,
+                        "token": "secret",
+                        "login": "bench",
+                    },
+                    "BUGZILLA": {"bugzilla_url": server.url, "api_key": "key"},
+                },
+                f,
+            )
+        # So that building the plugin index isn't in the first measurement
+        run_gg(repo, env, ["--help"])
+
+        results = {}
+        try:
+            for scenario in get_scenarios(repo, env, server.url):
+                if args.only and scenario.name not in args.only:
+                    continue
+                results[scenario.name] = run_scenario(scenario, repo, env, server, args)
+        finally:
+            server.stop()
+    return {
+        "date": datetime.datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "failure_rate": args.failure_rate,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def run_scenario(scenario, repo, env, server, args):
+    runs = []
+    for _ in range(args.repeat):
+        if scenario.setup:
+            scenario.setup()
+        server.take_counts()
+        t0 = time.perf_counter()
+        exit_code = run_gg(repo, env, scenario.argv, scenario.stdin)
+        took = time.perf_counter() - t0
+        runs.append(
+            {"time": took, "exit_code": exit_code, "requests": server.take_counts()}
+        )
+    first, rest = runs[0], runs[1:] or runs
+    result = {
+        "runs": runs,
+        "first": first["time"],
+        "median": statistics.median(r["time"] for r in rest),
+        "requests": statistics.median(r["requests"].get("total", 0) for r in rest),
+        "failures": sum(1 for r in runs if r["exit_code"]),
+    }
+    print(
+        f"\t{scenario.name:<16} {result['median'] * 1000:8.1f}ms"
+        f" {result['requests']:4g} requests"
+        f" (first {first['time'] * 1000:.1f}ms,"
+        f" {first['requests'].get('total', 0)} requests)"
+        + (f" {result['failures']} failed" if result["failures"] else "")
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Seconds")
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="From 0 to 1, of requests"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Only run these scenarios")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure how long the gg.state calls that a command like `gg commit`
+makes take with a big state file (one key per branch ever started), as
+JSON and as SQLite.
+
+Run it with::
+
+    python benchmarks/bench_state.py [NUMBER_OF_BRANCHES]
+"""
+
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+import click
+
+from gg import state
+
+REPO_NAME = "myrepo"
+
+
+class FakeConfig:
+    def __init__(self, configfile):
+        self.configfile = configfile
+        self.state_sessions = {}
+
+
+def make_state(configfile, branches):
+    data = {"FORK_NAME": "peterbe", "ORIGIN_NAME": "origin"}
+    now = datetime.datetime.now().isoformat()
+    for i in range(branches):
+        data[f"{REPO_NAME}:branch-{i}"] = {
+            "description": f"Branch number {i}",
+            "bugnumber": i,
+            "url": f"https://github.com/peterbe/gg/issues/{i}",
+            "date": now,
+        }
+    data[f"{REPO_NAME}:_config:push_to_origin"] = False
+    state.write(configfile, data)
+
+
+def like_gg_commit(configfile):
+    # Roughly the state calls `gg commit` makes on a topic branch
+    state.read(configfile).get("ORIGIN_NAME", "origin")
+    state.read(configfile)
+    for key in ("push_to_origin", "fixes_message"):
+        try:
+            state.load_config(configfile, key)
+        except KeyError:
+            pass
+    state.load(configfile, "branch-1")
+    state.read(configfile).get("FORK_NAME")
+    state.save(configfile, "New branch", "new-branch", bugnumber=None, url=None)
+
+
+def timeit(function, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function(*args)
+        took = time.perf_counter() - t0
+        best = took if best is None else min(best, took)
+    return best
+
+
+def main(branches=50_000):
+    state.get_repo_name = lambda: REPO_NAME
+    for filename in ("state.json", "state.sqlite3"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            configfile = os.path.join(tmp_dir, filename)
+            make_state(configfile, branches)
+            size = os.stat(configfile).st_size / 1024 / 1024
+            print(f"{filename} with {branches:,} branches ({size:.1f}MB)")
+
+            took = timeit(like_gg_commit, configfile)
+            print(f"\tWithout a session: {took * 1000:8.1f}ms")
+
+            def with_session():
+                config = FakeConfig(configfile)
+                with click.Context(click.Command("bench"), obj=config):
+                    like_gg_commit(configfile)
+
+            took = timeit(with_session)
+            print(f"\tWith a session:    {took * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
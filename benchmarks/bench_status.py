@@ -0,0 +1,92 @@
+"""Measure how long the "is the working tree dirty?" checks take in a big
+repo (200,000 files by default), the old GitPython way and with
+gg.status.Status, with and without core.untrackedCache and core.fsmonitor.
+
+Run it with::
+
+    python benchmarks/bench_status.py [NUMBER_OF_FILES]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import git
+
+from gg.status import Status, enable_speedups
+
+import synthetic
+
+
+def make_repo(directory, files):
+    """Create a repo with one commit of `files` files."""
+    synthetic.git(".", "init", "-q", directory)
+    synthetic.fast_import(
+        directory, synthetic.first_commit_lines("refs/heads/main", files)
+    )
+    synthetic.git(directory, "checkout", "-q", "-f", "main")
+    return git.Repo(directory)
+
+
+def old_dirty_check(repo):
+    # What getback, merge, rebase and mastermerge used to do
+    if repo.is_dirty():
+        return [x.b_path for x in repo.index.diff(None)]
+
+
+def dirty_check(repo):
+    status = Status(repo, untracked_files="no", renames=False)
+    if status.dirty:
+        return status.changed
+
+
+def commit_status(repo):
+    # What gg commit does
+    return Status(repo)
+
+
+def timeit(function, *args, repeat=3):
+    function(*args)  # warm up, e.g. the untracked cache
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function(*args)
+        took = time.perf_counter() - t0
+        best = took if best is None else min(best, took)
+    return best
+
+
+def report(repo):
+    for function in (old_dirty_check, dirty_check, commit_status):
+        took = timeit(function, repo)
+        print(f"\t{function.__name__:<20} {took * 1000:8.1f}ms")
+
+
+def main(files=200_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = os.path.join(tmp_dir, "repo")
+        t0 = time.perf_counter()
+        repo = make_repo(directory, files)
+        took = time.perf_counter() - t0
+        print(f"Created a repo with {files:,} files in {took:.1f}s")
+        # One changed and one untracked file, so there's something to find
+        with open(os.path.join(directory, "dir0", "file0.txt"), "w") as f:
+            f.write("changed")
+        with open(os.path.join(directory, "dir0", "new.txt"), "w") as f:
+            f.write("new")
+
+        print("Without any speedups")
+        report(repo)
+
+        speedups = enable_speedups(repo)
+        enabled = ", ".join(f"{k}={v}" for k, v in speedups.items() if v)
+        print(f"With {enabled}")
+        report(repo)
+        if speedups["core.fsmonitor"] == "true":
+            subprocess.run(["git", "fsmonitor--daemon", "stop"], cwd=directory)
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
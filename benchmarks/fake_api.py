@@ -0,0 +1,252 @@
+"""A local stand-in for the parts of the GitHub and Bugzilla APIs that gg
+uses, so that commands can be timed with realistic network latency but
+without the network (see bench_network.py). Like the real ones, it's
+HTTPS (with a self-signed certificate), sends GitHub's rate limit headers
+and ETags, answers 304 Not Modified to If-None-Match (which doesn't count
+against the rate limit) and fails now and then, if you want it to.
+
+GitHub issues and pull requests numbered up to MAX_ISSUE exist, and
+Bugzilla bugs from MIN_BUG on, so a number is only ever found in one.
+
+Run it on its own with::
+
+    python benchmarks/fake_api.py --latency 0.2 --jitter 0.05
+
+and point `gg github --github-url` and `gg bugzilla --bugzilla-url` at it,
+with $REQUESTS_CA_BUNDLE set to the certificate it prints.
+"""
+
+import argparse
+import collections
+import hashlib
+import http.server
+import json
+import os
+import random
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+
+MAX_ISSUE = 99_999
+MIN_BUG = 100_000
+RATE_LIMIT = 5_000
+ROUTES = [
+    ("user", r"/user"),
+    ("issue", r"/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/issues/(?P<number>\d+)"),
+    ("pulls", r"/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/pulls"),
+    ("pull", r"/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/pulls/(?P<number>\d+)"),
+    ("bugs", r"/rest/bug/?"),
+    ("whoami", r"/rest/whoami"),
+]
+ROUTES = [(name, re.compile(f"^{pattern}$")) for name, pattern in ROUTES]
+GITHUB_ROUTES = ("user", "issue", "pulls", "pull")
+
+
+def make_certificate(directory):
+    """Return the paths to a new self-signed certificate for 127.0.0.1, and
+    its key."""
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=127.0.0.1",
+            "-addext",
+            "subjectAltName=IP:127.0.0.1",
+            "-keyout",
+            keyfile,
+            "-out",
+            certfile,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certfile, keyfile
+
+
+class FakeAPI(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, certfile, keyfile, latency=0.1, jitter=0.0, failure_rate=0.0, port=0
+    ):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certfile, keyfile)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.counts = collections.Counter()
+        self.remaining = RATE_LIMIT
+        self.reset = int(time.time()) + 3600
+
+    @property
+    def url(self):
+        return f"https://127.0.0.1:{self.server_address[1]}"
+
+    def get_request(self):
+        sock, address = self.socket.accept()
+        # The handshake is done by the thread handling the request
+        return (
+            self.context.wrap_socket(
+                sock, server_side=True, do_handshake_on_connect=False
+            ),
+            address,
+        )
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def take_counts(self):
+        """Return how many requests there have been of each kind (and
+        'total'), since last time."""
+        with self.lock:
+            counts, self.counts = self.counts, collections.Counter()
+        return dict(counts)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    # Keep-alive, like the real thing
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed.query)
+        for name, pattern in ROUTES:
+            match = pattern.match(parsed.path)
+            if match:
+                break
+        else:
+            return self.respond(404, {"message": "Not Found"})
+
+        server = self.server
+        with server.lock:
+            server.counts[name] += 1
+            server.counts["total"] += 1
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        time.sleep(max(delay, 0))
+        if random.random() < server.failure_rate:
+            return self.respond(503, {"message": "Service Unavailable"})
+
+        github = name in GITHUB_ROUTES
+        if github and server.remaining <= 0:
+            return self.respond(403, {"message": "API rate limit exceeded"}, github)
+        status, data = getattr(self, f"get_{name}")(query, **match.groupdict())
+        body = json.dumps(data).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if status == 200 and etag in self.headers.get("If-None-Match", ""):
+            return self.respond(304, None, github, etag)
+        if github:
+            with server.lock:
+                server.remaining -= 1
+        self.respond(status, data, github, etag if status == 200 else None)
+
+    def respond(self, status, data, github=False, etag=None):
+        body = b"" if data is None else json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        if github:
+            self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+            self.send_header("X-RateLimit-Remaining", str(self.server.remaining))
+            self.send_header("X-RateLimit-Reset", str(self.server.reset))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_user(self, query):
+        return 200, {"login": "bench", "name": "Bench Mark"}
+
+    def get_issue(self, query, org, repo, number):
+        if int(number) > MAX_ISSUE:
+            return 404, {"message": "Not Found"}
+        return 200, {
+            "number": int(number),
+            "title": f"Issue number {number}",
+            "html_url": f"https://github.com/{org}/{repo}/issues/{number}",
+            "state": "open",
+        }
+
+    def get_pulls(self, query, org, repo):
+        # There's always one, for the branch that was asked for
+        pull_request = self.get_pull(query, org, repo, "1")[1]
+        pull_request["head"] = {"label": query.get("head", [""])[0]}
+        return 200, [pull_request]
+
+    def get_pull(self, query, org, repo, number):
+        if int(number) > MAX_ISSUE:
+            return 404, {"message": "Not Found"}
+        return 200, {
+            "number": int(number),
+            "html_url": f"https://github.com/{org}/{repo}/pull/{number}",
+            "state": "open",
+            "draft": False,
+            "mergeable": True,
+            "updated_at": "2020-09-13T12:26:40Z",
+        }
+
+    def get_bugs(self, query):
+        ids = [int(x) for x in query.get("ids", [""])[0].split(",") if x]
+        for id_ in ids:
+            if id_ < MIN_BUG:
+                # One that doesn't exist fails them all
+                return 404, {
+                    "error": True,
+                    "code": 101,
+                    "message": f"Bug #{id_} does not exist.",
+                }
+        return 200, {"bugs": [{"id": i, "summary": f"Bug number {i}"} for i in ids]}
+
+    def get_whoami(self, query):
+        return 200, {"id": 1, "name": "bench@example.com", "real_name": "Bench"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Seconds")
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="From 0 to 1, of requests"
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server = FakeAPI(
+            *make_certificate(tmp_dir),
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+            port=args.port,
+        )
+        print(f"Listening on {server.url}")
+        print(f"export REQUESTS_CA_BUNDLE={os.path.join(tmp_dir, 'cert.pem')}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(server.take_counts())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Create a big repo to run gg in, and a bare repo for its remote, without
+any network. Everything is written with git fast-import, because creating
+thousands of files, commits and branches one git command at a time takes
+forever.
+
+What's created in `directory`:
+
+* `origin.git`, a bare repo with a `main` branch that has `depth` commits,
+  the first of which has `files` files in it, and `remote_branches`
+  branches, each one commit on top of some commit on `main`.
+* `repo`, a clone of it, with `branches` local branches. Every other one is
+  merged into `main` already, the others have a commit of their own. And
+  `untracked` untracked files.
+* `fork.git`, a bare repo for the `fork` remote, which `main` has already
+  been pushed to.
+
+Also what the benchmarks that run gg commands in them have in common.
+"""
+
+import os
+import subprocess
+import sys
+
+FILES_PER_DIRECTORY = 100
+COMMITTER = "Bench <bench@example.com>"
+# The first commit's date. Every commit after it is an hour younger.
+EPOCH = 1_600_000_000
+
+GG = [sys.executable, "-c", "from gg.main import cli; cli()"]
+# Enough for any question gg asks
+YES = "\n" * 10
+
+
+class Scenario:
+    """One gg command, and what needs to be done before every run of it
+    that shouldn't count."""
+
+    def __init__(self, name, argv, setup=None, stdin=YES):
+        self.name = name
+        self.argv = argv
+        self.setup = setup
+        self.stdin = stdin
+
+
+def run_gg(repo, env, argv, stdin=YES, check=True, gg=GG):
+    """Run gg (`gg` is how) and return the exit code. Unless `check` is
+    false, failing is an error."""
+    process = subprocess.run(
+        gg + argv,
+        cwd=repo,
+        env=env,
+        input=stdin,
+        universal_newlines=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    if process.returncode:
+        message = f"gg {' '.join(argv)} failed:\n{process.stdout}"
+        if check:
+            raise RuntimeError(message)
+        print(message, file=sys.stderr)
+    return process.returncode
+
+
+def git(directory, *args, **kwargs):
+    return subprocess.run(
+        ["git", *args], cwd=directory, check=True, stdout=subprocess.PIPE, **kwargs
+    ).stdout
+
+
+def fast_import(directory, lines):
+    git(directory, "fast-import", "--quiet", input="\n".join(lines).encode("utf-8"))
+
+
+def commit_lines(ref, mark, date, message, changes, parent=None):
+    message = message.encode("utf-8")
+    lines = [
+        f"commit {ref}",
+        f"mark :{mark}",
+        f"committer {COMMITTER} {date} +0000",
+        f"data {len(message)}",
+        message.decode("utf-8"),
+    ]
+    if parent:
+        lines.append(f"from :{parent}")
+    lines.extend(changes)
+    lines.append("")
+    return lines
+
+
+def inline_file(path, content):
+    return [f"M 100644 inline {path}", f"data {len(content.encode('utf-8'))}", content]
+
+
+def first_commit_lines(ref, files):
+    """Return what to fast-import for a first commit, with mark 2, of
+    `files` files, which share one blob."""
+    lines = ["blob", "mark :1", "data 6", "hello", ""]
+    tracked = [
+        f"M 100644 :1 dir{i // FILES_PER_DIRECTORY}/file{i}.txt" for i in range(files)
+    ]
+    return lines + commit_lines(ref, 2, EPOCH, "First", tracked)
+
+
+def make_repos(
+    directory,
+    branches=100,
+    remote_branches=1000,
+    files=10_000,
+    untracked=100,
+    depth=100,
+):
+    """Create the repos (see above) in `directory` and return the path to the
+    clone to run gg in."""
+    origin = os.path.join(directory, "origin.git")
+    repo = os.path.join(directory, "repo")
+    fork = os.path.join(directory, "fork.git")
+    git(directory, "init", "-q", "--bare", "-b", "main", origin)
+    git(directory, "init", "-q", "--bare", "-b", "main", fork)
+
+    lines = first_commit_lines("refs/heads/main", files)
+    # The history. Commit number n has mark n + 2.
+    for n in range(1, depth):
+        lines += commit_lines(
+            "refs/heads/main",
+            n + 2,
+            EPOCH + n * 3600,
+            f"Commit {n}",
+            inline_file("history.txt", f"{n}\n"),
+            parent=n + 1,
+        )
+    mark = depth + 2
+    date = EPOCH + depth * 3600
+
+    def branch_off(ref, i, merged):
+        nonlocal mark, date
+        base = 2 + i % depth
+        if merged:
+            return [f"reset {ref}", f"from :{base}", ""]
+        mark += 1
+        date += 60
+        name = ref.rsplit("/", 1)[1]
+        changes = inline_file(f"branches/{name}.txt", f"{name}\n")
+        return commit_lines(ref, mark, date, f"Work on {name}", changes, base)
+
+    for i in range(remote_branches):
+        lines += branch_off(f"refs/heads/feature-{i}", i, merged=False)
+    # Where the local branches are kept until they're fetched into the clone
+    for i in range(branches):
+        merged = i % 2 == 0
+        name = f"merged-{i}" if merged else f"topic-{i}"
+        lines += branch_off(f"refs/local/{name}", i, merged)
+    fast_import(origin, lines)
+
+    git(directory, "clone", "-q", origin, repo)
+    git(repo, "fetch", "-q", "origin", "+refs/local/*:refs/heads/*")
+    refs = git(origin, "for-each-ref", "--format=delete %(refname)", "refs/local")
+    git(origin, "update-ref", "--stdin", input=refs)
+    git(repo, "remote", "add", "fork", fork)
+    git(repo, "push", "-q", "fork", "main")
+
+    for i in range(untracked):
+        path = os.path.join(repo, "scratch", f"dir{i // FILES_PER_DIRECTORY}")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, f"untracked{i}.txt"), "w") as f:
+            f.write("untracked\n")
+    return repo
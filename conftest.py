@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep everything gg caches (see gg.cache) out of the real home
+    directory and separate between tests."""
+    directory = tmp_path / "gg-cache"
+    monkeypatch.setenv("GG_CACHE_DIR", str(directory))
+    return directory
@@ -1,10 +1,18 @@
 import datetime
+import subprocess
 
 import click
 import git
 from gg.main import cli, pass_config
+from gg.refs import for_each_ref, get_branch_index, get_merged_branches, search
 from gg.state import read
-from gg.utils import error_out, info_out, success_out, warning_out
+from gg.utils import (
+    error_out,
+    get_default_branch,
+    info_out,
+    success_out,
+    warning_out,
+)
 
 
 class InvalidRemoteName(Exception):
@@ -46,6 +54,11 @@ def branches(config, yes=False, searchstring="", cutoff=DEFAULT_CUTOFF):
             state = read(config.configfile)
             origin_name = state.get("ORIGIN_NAME", "origin")
             branches_ = list(find(repo, searchstring, search_remote=origin_name))
+            if not branches_ and searchstring:
+                # Perhaps it's abbreviated or misspelled
+                branches_ = list(
+                    find(repo, searchstring, search_remote=origin_name, fuzzy=True)
+                )
     except InvalidRemoteName as exception:
         remote_search_name = searchstring.split(":")[0]
         if remote_search_name in [x.name for x in repo.remotes]:
@@ -67,9 +80,9 @@ def branches(config, yes=False, searchstring="", cutoff=DEFAULT_CUTOFF):
         branches_ = list(find(repo, searchstring))
 
     if branches_:
-        merged = get_merged_branches(repo)
+        merged = get_merged(repo, read(config.configfile))
         info_out("Found existing branches...")
-        print_list(branches_, merged, cutoff=cutoff)
+        print_list(repo, branches_, merged, cutoff=cutoff)
         if len(branches_) == 1 and searchstring:
             # If the found branch is the current one, error
             active_branch = repo.active_branch
@@ -97,6 +110,22 @@ def branches(config, yes=False, searchstring="", cutoff=DEFAULT_CUTOFF):
         warning_out("Found no branches.")
 
 
+def get_merged(repo, state):
+    """Return the names of the local branches that are merged into the
+    origin's default branch. Or none, if there's no such remote or its
+    default branch hasn't been fetched."""
+    origin_name = state.get("ORIGIN_NAME", "origin")
+    try:
+        default_branch = get_default_branch(
+            repo, origin_name, state.get("DEFAULT_BRANCH")
+        )
+        target = f"{origin_name}/{default_branch}"
+        repo.git.rev_parse("--verify", "-q", target)
+    except (git.GitCommandError, subprocess.CalledProcessError, NotImplementedError):
+        return set()
+    return get_merged_branches(repo, target)
+
+
 def fetch_origin(config):
     repo = config.repo
     state = read(config.configfile)
@@ -113,7 +142,7 @@ def fetch_origin(config):
     upstream_remote.fetch()
 
 
-def find(repo, searchstring, exact=False, search_remote=None):
+def find(repo, searchstring, exact=False, search_remote=None, fuzzy=False):
     # When you copy-to-clipboard from GitHub you get something like
     # 'peterbe:1545809-urllib3-1242' for example.
     # But first, it exists as a local branch, use that.
@@ -127,67 +156,68 @@ def find(repo, searchstring, exact=False, search_remote=None):
         else:
             raise InvalidRemoteName(remote_name)
 
-        for head in repo.heads:
-            if exact:
-                if searchstring.split(":", 1)[1].lower() == head.name.lower():
-                    yield head
-                    return
-            else:
-                if searchstring.split(":", 1)[1].lower() in head.name.lower():
-                    yield head
-                    return
-
-        info_out(f"Fetching the latest from {found_remote}")
-        for fetchinfo in found_remote.fetch():
-            if fetchinfo.flags & git.remote.FetchInfo.HEAD_UPTODATE:
-                # Most boring
-                pass
-            else:
-                msg = "updated"
-                if fetchinfo.flags & git.remote.FetchInfo.FORCED_UPDATE:
-                    msg += " (force updated)"
-                print(fetchinfo.ref, msg)
-
-            if str(fetchinfo.ref) == searchstring.replace(":", "/", 1):
-                yield fetchinfo.ref
-
-    for head in repo.heads:
-        if searchstring:
-            if exact:
-                if searchstring.lower() != head.name.lower():
-                    continue
-            else:
-                if searchstring.lower() not in head.name.lower():
-                    continue
-        yield head
+        for head in find(repo, searchstring.split(":", 1)[1], exact=exact):
+            yield head
+            return
 
-    if search_remote:
-        remote_refs = repo.remote().refs
-        for ref in remote_refs:
-            _, rest = ref.name.split(f"{search_remote}/")
-            if exact:
-                print((rest, searchstring))
-                if searchstring.lower() == rest.lower():
-                    yield ref
-            elif searchstring.lower() in rest.lower():
-                yield ref
-
-
-def get_merged_branches(repo):
-    # XXX I wish I could dedude from a git.refs.head.Head object if it was
-    # merged. Then I wouldn't have to do this string splitting crap.
-    output = repo.git.branch("--merged")
-    return [x.split()[-1] for x in output.splitlines() if x.strip()]
-
-
-def print_list(heads, merged_names, cutoff=10):
-    def wrap(head):
-        commit = head.commit
-        return {
-            "head": head,
-            "info": {"date": commit.committed_datetime, "message": commit.message},
-        }
+        yield from fetch_branch(found_remote, searchstring.split(":", 1)[1])
+
+    # Newest first
+    branches = get_branch_index(repo)
+    heads = [branch for branch in branches if branch[0].startswith("refs/heads/")]
+    names = [branch[1] for branch in heads]
+    for i in search(names, searchstring, exact=exact, fuzzy=fuzzy):
+        yield git.Head(repo, heads[i][0])
 
+    if search_remote:
+        prefix = f"refs/remotes/{search_remote}/"
+        remote_refs = [branch for branch in branches if branch[0].startswith(prefix)]
+        # The lowercase names start with 'origin/'
+        names = [branch[1].split("/", 1)[1] for branch in remote_refs]
+        for i in search(names, searchstring, exact=exact, fuzzy=fuzzy):
+            yield git.RemoteReference(repo, remote_refs[i][0])
+
+
+class FetchProgress(git.RemoteProgress):
+    OPERATIONS = {
+        git.RemoteProgress.COUNTING: "Counting objects",
+        git.RemoteProgress.COMPRESSING: "Compressing objects",
+        git.RemoteProgress.RECEIVING: "Receiving objects",
+        git.RemoteProgress.RESOLVING: "Resolving deltas",
+        git.RemoteProgress.FINDING_SOURCES: "Finding sources",
+    }
+
+    def update(self, op_code, cur_count, max_count=None, message=""):
+        line = self.OPERATIONS.get(op_code & self.OP_MASK, "Fetching") + ": "
+        if max_count:
+            line += f"{cur_count / max_count:.0%} ({cur_count:.0f}/{max_count:.0f})"
+        else:
+            line += f"{cur_count:.0f}"
+        if message:
+            line += f", {message}"
+        click.echo(f"\r{line}", nl=bool(op_code & self.END), err=True)
+
+
+def fetch_branch(remote, branch_name):
+    """Fetch only this one branch (if it exists) from the remote, instead of
+    all of them, and yield its remote ref."""
+    # With the pattern, the remote only has to list the refs that match
+    refname = f"refs/heads/{branch_name}"
+    output = remote.repo.git.ls_remote("--heads", remote.name, refname)
+    if not any(line.endswith(f"\t{refname}") for line in output.splitlines()):
+        return
+    info_out(f"Fetching {branch_name!r} from {remote}")
+    refspec = f"+{refname}:refs/remotes/{remote.name}/{branch_name}"
+    for fetchinfo in remote.fetch(refspec, no_tags=True, progress=FetchProgress()):
+        if not fetchinfo.flags & git.remote.FetchInfo.HEAD_UPTODATE:
+            msg = "updated"
+            if fetchinfo.flags & git.remote.FetchInfo.FORCED_UPDATE:
+                msg += " (force updated)"
+            print(fetchinfo.ref, msg)
+        yield fetchinfo.ref
+
+
+def print_list(repo, heads, merged_names, cutoff=10):
     def format_age(dt):
         # This `dt` is timezone aware. So cheat, so we don't need to figure out
         # our timezone is.
@@ -211,23 +241,26 @@ def print_list(heads, merged_names, cutoff=10):
             return message[:76] + "…"
         return message
 
-    wrapped = sorted(
-        [wrap(head) for head in heads],
-        key=lambda x: x["info"].get("date"),
-        reverse=True,
-    )
+    paths = {head.path: head for head in heads}
+    patterns = sorted({"/".join(path.split("/")[:2]) for path in paths})
+    wrapped = []
+    # They come newest first, so there's no need to look at any more than
+    # the first `cutoff` ones.
+    for ref in for_each_ref(repo, *patterns):
+        if ref["refname"] in paths:
+            wrapped.append({"head": paths[ref["refname"]], "info": ref})
+            if len(wrapped) == cutoff:
+                break
 
-    for each in wrapped[:cutoff]:
+    for each in wrapped:
         info_out("".center(80, "-"))
         success_out(
             each["head"].name
             + (each["head"].name in merged_names and " (MERGED ALREADY)" or "")
         )
-        if each.get("error"):
-            info_out(f"\tError getting ref log ({each['error']!r})")
         info_out("\t" + each["info"]["date"].isoformat())
         info_out("\t" + format_age(each["info"]["date"]))
-        info_out("\t" + format_msg(each["info"].get("message", "*no commit yet*")))
+        info_out("\t" + format_msg(each["info"]["subject"]))
         info_out("")
 
     if len(heads) > cutoff:
@@ -1,9 +1,9 @@
-import datetime
-
 import click
 import git
 from gg.main import cli, pass_config
-from gg.utils import error_out, info_out, success_out, warning_out
+from gg.builtins.branches.gg_branches import print_list
+from gg.refs import get_merged_branches
+from gg.utils import error_out, info_out, warning_out
 
 
 class InvalidRemoteName(Exception):
@@ -52,7 +52,7 @@ def fetchcheckout(config, yes=False, searchstring="", cutoff=DEFAULT_CUTOFF):
     if branches_:
         merged = get_merged_branches(repo)
         info_out("Found existing branches...")
-        print_list(branches_, merged, cutoff=cutoff)
+        print_list(repo, branches_, merged, cutoff=cutoff)
         if len(branches_) == 1 and searchstring:
             # If the found branch is the current one, error
             active_branch = repo.active_branch
@@ -121,66 +121,3 @@ def find(repo, searchstring, exact=False):
                 if searchstring.lower() not in head.name.lower():
                     continue
         yield head
-
-
-def get_merged_branches(repo):
-    # XXX I wish I could dedude from a git.refs.head.Head object if it was
-    # merged. Then I wouldn't have to do this string splitting crap.
-    output = repo.git.branch("--merged")
-    return [x.split()[-1] for x in output.splitlines() if x.strip()]
-
-
-def print_list(heads, merged_names, cutoff=10):
-    def wrap(head):
-        commit = head.commit
-        return {
-            "head": head,
-            "info": {"date": commit.committed_datetime, "message": commit.message},
-        }
-
-    def format_age(dt):
-        # This `dt` is timezone aware. So cheat, so we don't need to figure out
-        # our timezone is.
-        delta = datetime.timedelta(
-            seconds=datetime.datetime.utcnow().timestamp() - dt.timestamp()
-        )
-        if delta.days < 1:
-            seconds = delta.total_seconds()
-            minutes = seconds / 60
-            if seconds > 60 * 60:
-                hours = minutes / 60
-                return f"{hours:.0f} hours"
-            elif seconds > 60:
-                return f"{minutes:.0f} minutes"
-            return f"{seconds:.0f} seconds"
-        return str(delta)
-
-    def format_msg(message):
-        message = message.strip().replace("\n", "\\n")
-        if len(message) > 80:
-            return message[:76] + "…"
-        return message
-
-    wrapped = sorted(
-        [wrap(head) for head in heads],
-        key=lambda x: x["info"].get("date"),
-        reverse=True,
-    )
-
-    for each in wrapped[:cutoff]:
-        info_out("".center(80, "-"))
-        success_out(
-            each["head"].name
-            + (each["head"].name in merged_names and " (MERGED ALREADY)" or "")
-        )
-        if each.get("error"):
-            info_out(f"\tError getting ref log ({each['error']!r})")
-        info_out("\t" + each["info"]["date"].isoformat())
-        info_out("\t" + format_age(each["info"]["date"]))
-        info_out("\t" + format_msg(each["info"].get("message", "*no commit yet*")))
-        info_out("")
-
-    if len(heads) > cutoff:
-        warning_out(
-            f"Note! Found total of {len(heads)} but only showing {cutoff} most recent."
-        )
@@ -3,6 +3,7 @@ import os
 import tempfile
 import shutil
 
+import git
 import pytest
 import requests_mock
 from click.testing import CliRunner
@@ -13,7 +14,7 @@ from click.testing import CliRunner
 # but then that wouldn't test the entry point loading.
 from gg.main import Config
 
-from gg.builtins.branches.gg_branches import branches
+from gg.builtins.branches.gg_branches import FetchProgress, branches, fetch_branch
 
 
 @pytest.fixture(autouse=True)
@@ -45,19 +46,22 @@ def temp_configfile():
 def test_branches(temp_configfile, mocker):
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
-    mocked_git().git.branch.return_value = """
-    * this-branch
-    other-branch
-    """
-    branch1 = mocker.MagicMock()
-    branch1.name = "this-branch"
+    default_branch = mocker.patch("gg.builtins.branches.gg_branches.get_default_branch")
+    default_branch.return_value = "master"
 
-    branch2 = mocker.MagicMock()
-    branch2.name = "other-branch"
+    def for_each_ref(*args):
+        if "--merged=origin/master" in args:
+            return "this-branch\nother-branch"
+        return "\n".join(
+            [
+                "refs/heads/other-branch\x001600000000 +0100\x00\x00Other commit",
+                "refs/heads/this-branch\x001500000000 -0500\x00\x00This commit",
+                "refs/heads/not-merged-branch\x001400000000 +0000\x00\x00Old",
+            ]
+        )
 
-    branch3 = mocker.MagicMock()
-    branch3.name = "not-merged-branch"
-    mocked_git().heads.__iter__.return_value = [branch1, branch2, branch3]
+    mocked_git().git.for_each_ref.side_effect = for_each_ref
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
 
     state = json.load(open(temp_configfile))
     state["FORK_NAME"] = "peterbe"
@@ -74,11 +78,51 @@ def test_branches(temp_configfile, mocker):
         # print(result.exception)
         raise result.exception
     # print(result.output)
-    assert "other-branch" in result.output
+    assert "other-branch (MERGED ALREADY)" in result.output
+    assert "2020-09-13T13:26:40+01:00" in result.output
+    assert "Other commit" in result.output
     assert "this-branch" not in result.output
     assert result.exit_code == 0
     assert not result.exception
 
-    # .assert_called_once() is new only in 3.6
-    # branch2.checkout.assert_called_once()
-    branch2.checkout.assert_called_with()
+    (checked_out,), _ = mocked_git().git.checkout.call_args
+    assert checked_out.path == "refs/heads/other-branch"
+
+
+def test_branches_without_remote(temp_configfile, tmp_path, monkeypatch):
+    repo = git.Repo.init(tmp_path / "repo")
+    repo.index.commit("first")
+    repo.create_head("topic")
+    monkeypatch.chdir(repo.working_tree_dir)
+
+    runner = CliRunner()
+    config = Config()
+    config.configfile = temp_configfile
+    result = runner.invoke(branches, [], obj=config)
+    if result.exception:
+        raise result.exception
+    assert "topic" in result.output
+    assert "MERGED ALREADY" not in result.output
+
+
+def test_fetch_branch(tmp_path):
+    upstream = git.Repo.init(tmp_path / "upstream")
+    upstream.index.commit("first")
+    upstream.create_head("wanted")
+    upstream.create_head("unwanted")
+    repo = git.Repo.init(tmp_path / "clone")
+    remote = repo.create_remote("origin", str(tmp_path / "upstream"))
+
+    assert list(fetch_branch(remote, "nonexistent")) == []
+    (ref,) = fetch_branch(remote, "wanted")
+    assert ref.name == "origin/wanted"
+    assert [r.name for r in remote.refs] == ["origin/wanted"]
+
+
+def test_fetch_progress(capsys):
+    progress = FetchProgress()
+    progress.update(FetchProgress.RECEIVING | FetchProgress.BEGIN, 5, 20)
+    progress.update(FetchProgress.RECEIVING | FetchProgress.END, 20, 20, "1 MiB")
+    assert capsys.readouterr().err == (
+        "\rReceiving objects: 25% (5/20)" "\rReceiving objects: 100% (20/20), 1 MiB\n"
+    )
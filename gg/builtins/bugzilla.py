@@ -1,15 +1,23 @@
 import json
+import time
 import getpass
 import urllib.parse
 
 import click
 import requests
 
-from gg.utils import error_out, success_out, info_out
+from gg import cache, http_client
+from gg.utils import error_out, success_out, info_out, is_bugzilla
 from gg.state import read, update, remove
 from gg.main import cli, pass_config
+from gg.trace import traced
 
 BUGZILLA_URL = "https://bugzilla.mozilla.org"
+# Summaries rarely change so remember them for a day
+SUMMARY_CACHE_NAME = "bugzilla-summaries.json"
+SUMMARY_CACHE_TTL = 60 * 60 * 24
+# How many bugs to ask for in one request
+BATCH_SIZE = 100
 
 
 @cli.group()
@@ -44,7 +52,7 @@ def login(config, api_key=""):
     # Before we store it, let's test it.
     url = urllib.parse.urljoin(config.bugzilla_url, "/rest/whoami")
     assert url.startswith("https://"), url
-    response = requests.get(url, params={"api_key": api_key})
+    response = http_client.get(url, params={"api_key": api_key})
     if response.status_code == 200:
         if response.json().get("error"):
             error_out(f"Failed - {response.json()}")
@@ -76,30 +84,113 @@ def logout(config):
         error_out("No stored Bugzilla credentials")
 
 
-def get_summary(config, bugnumber):
-    params = {"ids": bugnumber, "include_fields": "summary,id"}
+def get_summary(config, bugnumber, state=None, **kwargs):
+    summaries = get_summaries(config, [bugnumber], state=state, **kwargs)
+    summary, url = summaries.get(int(bugnumber), (None, None))
+    return summary, url
+
+
+@traced()
+def get_summaries(config, bugnumbers, refresh=False, state=None, **kwargs):
+    """Return a dict of `{bugnumber: (summary, url)}` for all the bugs that
+    could be found. Those looked up recently come from the cache, and the
+    rest are fetched in as few requests as possible.
+    Raises requests.HTTPError if a single bug can't be fetched.
+    The `state` can be passed in if it's been read already, and any
+    `kwargs` (e.g. timeout) are passed on to the requests."""
     # If this function is called from a plugin, we don't have
     # config.bugzilla_url this time.
     base_url = getattr(config, "bugzilla_url", BUGZILLA_URL)
-    state = read(config.configfile)
+    api_key = None
+    if state is None:
+        state = read(config.configfile)
 
     credentials = state.get("BUGZILLA")
     if credentials:
         # cool! let's use that
         base_url = credentials["bugzilla_url"]
-        params["api_key"] = credentials["api_key"]
-
+        api_key = credentials["api_key"]
+
+    cached = cache.read(SUMMARY_CACHE_NAME, {})
+    now = time.time()
+    summaries = {}
+    missing = []
+    for bugnumber in dict.fromkeys(int(x) for x in bugnumbers):
+        entry = cached.get(f"{base_url}:{bugnumber}")
+        if entry and not refresh and now - entry["time"] < SUMMARY_CACHE_TTL:
+            summaries[bugnumber] = entry["summary"], entry["url"]
+        else:
+            missing.append(bugnumber)
+    if not missing:
+        return summaries
+
+    for start in range(0, len(missing), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        batch = missing[start:end]
+        for bug in fetch_bugs(base_url, api_key, batch, **kwargs):
+            bug_url = urllib.parse.urljoin(base_url, f"/show_bug.cgi?id={bug['id']}")
+            summaries[bug["id"]] = bug["summary"], bug_url
+            cached[f"{base_url}:{bug['id']}"] = {
+                "summary": bug["summary"],
+                "url": bug_url,
+                "time": now,
+            }
+    cache.write(
+        SUMMARY_CACHE_NAME,
+        {
+            key: entry
+            for key, entry in cached.items()
+            if now - entry["time"] < SUMMARY_CACHE_TTL
+        },
+    )
+    return summaries
+
+
+def fetch_bugs(base_url, api_key, bugnumbers, **kwargs):
+    params = {"ids": ",".join(str(x) for x in bugnumbers)}
+    params["include_fields"] = "summary,id"
+    if api_key:
+        params["api_key"] = api_key
     url = urllib.parse.urljoin(base_url, "/rest/bug/")
     assert url.startswith("https://"), url
-    response = requests.get(url, params=params)
+    response = http_client.get(url, params=params, **kwargs)
+    if not response.ok and len(bugnumbers) > 1:
+        # One bug that doesn't exist (or is private) fails the whole lot,
+        # so get what we can one by one.
+        bugs = []
+        for bugnumber in bugnumbers:
+            try:
+                bugs.extend(fetch_bugs(base_url, api_key, [bugnumber], **kwargs))
+            except requests.HTTPError:
+                pass
+        return bugs
     response.raise_for_status()
-    if response.status_code == 200:
-        data = response.json()
-        bug = data["bugs"][0]
+    return response.json()["bugs"]
+
 
-        bug_url = urllib.parse.urljoin(base_url, f"/show_bug.cgi?id={bug['id']}")
-        return bug["summary"], bug_url
-    return None, None
+@bugzilla.command()
+@click.option(
+    "--refresh", is_flag=True, help="Fetch them all even if they're already cached"
+)
+@pass_config
+def prefetch(config, refresh):
+    """Cache the summaries of the bugs of all your branches."""
+    state = read(config.configfile)
+    bugnumbers = []
+    for key in state:
+        if ":" not in key or ":_config:" in key:
+            continue
+        data = state[key]
+        if isinstance(data, dict) and is_bugzilla(data):
+            bugnumbers.append(data["bugnumber"])
+    if not bugnumbers:
+        info_out("No branches with a Bugzilla bug")
+        return
+    summaries = get_summaries(config, bugnumbers, refresh=refresh)
+    if config.verbose:
+        for bugnumber, (summary, _) in sorted(summaries.items()):
+            info_out(f"{bugnumber}\t{summary}")
+    success_out(f"{len(summaries)} of {len(set(bugnumbers))} bug summaries cached")
 
 
 @bugzilla.command()
@@ -127,7 +218,7 @@ def test(config, bugnumber):
         url = urllib.parse.urljoin(credentials["bugzilla_url"], "/rest/whoami")
         assert url.startswith("https://"), url
 
-        response = requests.get(url, params={"api_key": credentials["api_key"]})
+        response = http_client.get(url, params={"api_key": credentials["api_key"]})
         if response.status_code == 200:
             if response.json().get("error"):
                 error_out(f"Failed! - {response.json()}")
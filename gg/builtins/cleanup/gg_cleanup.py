@@ -3,6 +3,7 @@ import click
 from gg.utils import error_out, info_out, get_default_branch, warning_out
 from gg.state import read
 from gg.main import cli, pass_config
+from gg.refs import fast_forward, get_merged_branches, get_squashed_branches
 from gg.builtins.branches.gg_branches import find
 
 
@@ -17,7 +18,7 @@ def cleanup(config, searchstring, force=False):
     state = read(config.configfile)
     origin_name = state.get("ORIGIN_NAME", "origin")
     # default_branch = state.get("DEFAULT_BRANCH", "master")
-    default_branch = get_default_branch(repo, origin_name)
+    default_branch = get_default_branch(repo, origin_name, state.get("DEFAULT_BRANCH"))
 
     branches_ = list(find(repo, searchstring))
     if not branches_:
@@ -47,23 +48,20 @@ def cleanup(config, searchstring, force=False):
     if not upstream_remote:
         error_out("No remote called {!r} found".format(origin_name))
 
-    # Check out default branch
-    repo.heads[default_branch].checkout()
-    upstream_remote.pull(repo.heads[default_branch])
+    # Whatever's checked out stays checked out. If it's the default branch,
+    # it can't be fast-forwarded, but the merged check only needs the
+    # remote-tracking branch anyway.
+    fast_forward(repo, origin_name, default_branch)
 
     # Is this one of the merged branches?!
-    # XXX I don't know how to do this "nativly" with GitPython.
-    merged_branches = [
-        x.strip()
-        for x in repo.git.branch("--merged").splitlines()
-        if x.strip() and not x.strip().startswith("*")
-    ]
-    was_merged = branch_name in merged_branches
+    target = f"{origin_name}/{default_branch}"
+    was_merged = branch_name in get_merged_branches(repo, target)
     certain = was_merged or force
+    if not certain and get_squashed_branches(repo, target, [branch_name]):
+        info_out(f"{branch_name} was squash merged or rebased into {target}.")
+        certain = True
     if not certain:
         # Need to ask the user.
-        # XXX This is where we could get smart and compare this branch
-        # with the default branch.
         certain = (
             input("Are you certain {} is actually merged? [Y/n] ".format(branch_name))
             .lower()
@@ -73,10 +71,9 @@ def cleanup(config, searchstring, force=False):
     if not certain:
         return 1
 
-    if was_merged:
-        repo.git.branch("-d", branch_name)
-    else:
-        repo.git.branch("-D", branch_name)
+    # Not -d, because that compares with HEAD, which can be any branch, and
+    # whether it's merged has been checked above.
+    repo.git.branch("-D", branch_name)
 
     fork_remote = None
     state = read(config.configfile)
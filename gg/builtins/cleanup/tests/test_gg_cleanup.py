@@ -43,21 +43,26 @@ def temp_configfile():
 
 
 def test_cleanup(temp_configfile, mocker):
+    default_branch = mocker.patch("gg.builtins.cleanup.gg_cleanup.get_default_branch")
+    default_branch.return_value = "master"
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
-    mocked_git().git.branch.return_value = """
-    this-branch
-    * other-branch
-    """
-    branch1 = mocker.MagicMock()
-    branch1.name = "this-branch"
-
-    branch2 = mocker.MagicMock()
-    branch2.name = "other-branch"
-
-    branch3 = mocker.MagicMock()
-    branch3.name = "not-merged-branch"
-    mocked_git().heads.__iter__.return_value = [branch1, branch2, branch3]
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git_dir = os.path.dirname(temp_configfile)
+
+    def for_each_ref(*args):
+        if "--format=%(refname:lstrip=2) %(objectname)" in args:
+            return "other-branch abc123"
+        if any(arg.startswith("--merged") for arg in args):
+            return "this-branch"
+        return "\n".join(
+            f"refs/heads/{name}\x001600000000 +0000\x00\x00Subject"
+            for name in ("this-branch", "other-branch", "not-merged-branch")
+        )
+
+    mocked_git().git.for_each_ref.side_effect = for_each_ref
+    mocked_git().git.rev_parse.return_value = "def456"
+    mocker.patch("gg.refs.is_squashed").return_value = False
 
     active_branch = mocker.MagicMock()
     mocked_git().active_branch = active_branch
@@ -83,4 +88,7 @@ def test_cleanup(temp_configfile, mocker):
     assert result.exit_code == 0
     assert not result.exception
 
-    mocked_git().git.branch.assert_called_with("-D", branch2.name)
+    mocked_git().git.branch.assert_called_with("-D", "other-branch")
+    # The working tree is left alone
+    mocked_git().git.fetch.assert_called_with("origin", "master:master")
+    mocked_git().heads["master"].checkout.assert_not_called()
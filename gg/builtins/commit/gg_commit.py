@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
 
-import os
 import re
-import time
 
 import click
 import git
 from gg.builtins import github
 from gg.main import cli, pass_config
 from gg.state import load, read, load_config
+from gg.status import Status, get_ages
 from gg.utils import (
     error_out,
     get_default_branch,
@@ -41,7 +40,7 @@ def commit(config, no_verify, yes):
 
     state = read(config.configfile)
     origin_name = state.get("ORIGIN_NAME", "origin")
-    default_branch = get_default_branch(repo, origin_name)
+    default_branch = get_default_branch(repo, origin_name, state.get("DEFAULT_BRANCH"))
 
     active_branch = repo.active_branch
     if active_branch.name == default_branch:
@@ -50,49 +49,14 @@ def commit(config, no_verify, yes):
             f"You really ought to do work in branches."
         )
 
-    now = time.time()
-
-    def count_files_in_directory(directory):
-        count = 0
-        for root, _, files in os.walk(directory):
-            # We COULD crosscheck these files against the .gitignore
-            # if we ever felt overachievious.
-            count += len(files)
-        return count
-
-    # First group all untracked files by root folder
-    all_untracked_files = {}
-    for path in repo.untracked_files:
-        root = path.split(os.path.sep)[0]
-        if root not in all_untracked_files:
-            all_untracked_files[root] = {
-                "files": [],
-                "total_count": count_files_in_directory(root),
-            }
-        all_untracked_files[root]["files"].append(path)
-
-    # Now filter this based on it being single files or a bunch
-    untracked_files = {}
-    for root, info in all_untracked_files.items():
-        for path in info["files"]:
-            age = now - os.stat(path).st_mtime
-            # If there's fewer untracked files in its directory, suggest
-            # the directory instead.
-            if info["total_count"] == 1:
-                path = root
-            if path in untracked_files:
-                if age < untracked_files[path]:
-                    # youngest file in that directory
-                    untracked_files[path] = age
-            else:
-                untracked_files[path] = age
+    status = Status(repo)
+    # Entire untracked directories are collapsed, e.g. 'node_modules/'
+    untracked_files = get_ages(repo.working_tree_dir, status.untracked)
 
     if untracked_files:
         ordered = sorted(untracked_files.items(), key=lambda x: x[1], reverse=True)
         info_out("NOTE! There are untracked files:")
         for path, age in ordered:
-            if os.path.isdir(path):
-                path = path + "/"
             print("\t", path.ljust(60), humanize_seconds(age), "old")
 
         # But only put up this input question if one the files is
@@ -154,16 +118,9 @@ def commit(config, no_verify, yes):
 
     # Now we're going to do the equivalent of `git commit -a -m "..."`
     index = repo.index
-    files_added = []
-    files_removed = []
-    for x in repo.index.diff(None):
-        if x.deleted_file:
-            files_removed.append(x.b_path)
-        else:
-            files_added.append(x.b_path)
-    files_new = []
-    for x in repo.index.diff(repo.head.commit):
-        files_new.append(x.b_path)
+    files_added = status.modified
+    files_removed = status.deleted
+    files_new = status.staged
 
     proceed = True
     if not (files_added or files_removed or files_new):
@@ -177,7 +134,7 @@ def commit(config, no_verify, yes):
         print(f"msg={msg!r}")
         raise Exception("HOW DID THAT HAPPEN!?")
     if proceed:
-        if not repo.is_dirty():
+        if not status.dirty:
             error_out("Branch is not dirty. There is nothing to commit.")
         if files_added:
             index.add(files_added)
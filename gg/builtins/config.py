@@ -1,6 +1,6 @@
 import click
 
-from gg.utils import success_out, info_out
+from gg.utils import get_default_branch, success_out, info_out
 from gg.state import update, read
 from gg.main import cli, pass_config
 
@@ -24,8 +24,20 @@ from gg.main import cli, pass_config
     default="",
     help="Name of the default branch.",
 )
+@click.option(
+    "--refresh-default-branch",
+    is_flag=True,
+    default=False,
+    help="Ask the origin remote what its default branch is now.",
+)
 @pass_config
-def config(config, fork_name="", origin_name="", default_branch=""):
+def config(
+    config,
+    fork_name="",
+    origin_name="",
+    default_branch="",
+    refresh_default_branch=False,
+):
     """Setting various configuration options"""
     state = read(config.configfile)
     if fork_name:
@@ -45,3 +57,8 @@ def config(config, fork_name="", origin_name="", default_branch=""):
         success_out(f"default-branch set to: {default_branch}")
     else:
         info_out(f"default-branch: {state.get('DEFAULT_BRANCH', '*not set*')}")
+
+    if refresh_default_branch:
+        origin_name = state.get("ORIGIN_NAME", "origin")
+        default_branch = get_default_branch(config.repo, origin_name, refresh=True)
+        success_out(f"default branch of {origin_name!r} is: {default_branch}")
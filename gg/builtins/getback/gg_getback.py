@@ -2,7 +2,9 @@ import click
 
 from gg.utils import error_out, info_out, get_default_branch, warning_out
 from gg.state import read, load_config
+from gg.status import Status
 from gg.main import cli, pass_config
+from gg.refs import fast_forward, get_merged_branches, get_squashed_branches
 
 
 @cli.command()
@@ -15,13 +17,14 @@ def getback(config, force=False):
 
     state = read(config.configfile)
     origin_name = state.get("ORIGIN_NAME", "origin")
-    default_branch = get_default_branch(repo, origin_name)
+    default_branch = get_default_branch(repo, origin_name, state.get("DEFAULT_BRANCH"))
     active_branch = repo.active_branch
     if active_branch.name == default_branch:
         error_out(f"You're already on the {default_branch} branch.")
 
-    if repo.is_dirty():
-        dirty_paths = ", ".join([repr(x.b_path) for x in repo.index.diff(None)])
+    status = Status(repo, untracked_files="no", renames=False)
+    if status.dirty:
+        dirty_paths = ", ".join(map(repr, status.changed))
         error_out(f'Repo is "dirty". ({dirty_paths})')
 
     branch_name = active_branch.name
@@ -36,23 +39,23 @@ def getback(config, force=False):
     if not upstream_remote:
         error_out(f"No remote called {origin_name!r} found")
 
-    # Check out default branch
+    # Update the default branch first, so it's only checked out once
+    if not fast_forward(repo, origin_name, default_branch):
+        warning_out(
+            f"Couldn't fast-forward {default_branch} to "
+            f"{origin_name}/{default_branch}. Using it as is."
+        )
     repo.heads[default_branch].checkout()
-    upstream_remote.pull(repo.heads[default_branch])
 
     # Is this one of the merged branches?!
-    # XXX I don't know how to do this "natively" with GitPython.
-    merged_branches = [
-        x.strip()
-        for x in repo.git.branch("--merged").splitlines()
-        if x.strip() and not x.strip().startswith("*")
-    ]
-    was_merged = branch_name in merged_branches
+    target = f"{origin_name}/{default_branch}"
+    was_merged = branch_name in get_merged_branches(repo, target)
     certain = was_merged or force
+    if not certain and get_squashed_branches(repo, target, [branch_name]):
+        info_out(f"{branch_name} was squash merged or rebased into {target}.")
+        certain = True
     if not certain:
         # Need to ask the user.
-        # XXX This is where we could get smart and compare this branch
-        # with the default branch.
         certain = (
             input("Are you certain {} is actually merged? [Y/n] ".format(branch_name))
             .lower()
@@ -62,10 +65,9 @@ def getback(config, force=False):
     if not certain:
         return 1
 
-    if was_merged:
-        repo.git.branch("-d", branch_name)
-    else:
-        repo.git.branch("-D", branch_name)
+    # Not -d, because that compares with HEAD, which might not have been
+    # fast-forwarded, and whether it's merged has been checked above.
+    repo.git.branch("-D", branch_name)
 
     try:
         push_to_origin = load_config(config.configfile, "push_to_origin")
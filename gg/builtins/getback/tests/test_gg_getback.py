@@ -2,6 +2,7 @@ import json
 import os
 import tempfile
 import shutil
+import subprocess
 
 import pytest
 import requests_mock
@@ -43,6 +44,8 @@ def temp_configfile():
 
 
 def test_getback(temp_configfile, mocker):
+    default_branch = mocker.patch("gg.builtins.getback.gg_getback.get_default_branch")
+    default_branch.return_value = "master"
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
     active_branch = mocker.MagicMock()
@@ -50,7 +53,7 @@ def test_getback(temp_configfile, mocker):
     mocked_remote = mocker.MagicMock()
     mocked_remote.name = "origin"
     mocked_git().remotes.__iter__.return_value = [mocked_remote]
-    mocked_git().is_dirty.return_value = False
+    mocked_git().git.status.return_value = ""
 
     state = json.load(open(temp_configfile))
     state["FORK_NAME"] = "peterbe"
@@ -70,3 +73,45 @@ def test_getback(temp_configfile, mocker):
     assert not result.exception
 
     mocked_git().git.branch.assert_called_with("-D", active_branch.name)
+    mocked_git().git.fetch.assert_called_with("origin", "master:master")
+    mocked_git().heads["master"].checkout.assert_called_once_with()
+
+
+def test_getback_diverged_default_branch(temp_configfile, tmp_path, monkeypatch):
+    def git(directory, *args):
+        subprocess.run(
+            ["git", "-c", "user.name=Me", "-c", "user.email=me@example.com", *args],
+            cwd=directory,
+            check=True,
+            capture_output=True,
+        )
+
+    upstream = tmp_path / "upstream"
+    clone = tmp_path / "clone"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(upstream))
+    git(tmp_path, "clone", "-q", str(upstream), str(clone))
+    git(clone, "commit", "-q", "--allow-empty", "-m", "first")
+    git(clone, "push", "-q", "origin", "main")
+    # The topic branch is merged upstream...
+    git(clone, "checkout", "-q", "-b", "topic")
+    git(clone, "commit", "-q", "--allow-empty", "-m", "topic")
+    git(clone, "push", "-q", "origin", "topic:main")
+    git(clone, "fetch", "-q", "origin")
+    # ...but the local main has a commit of its own, so it can't be
+    # fast-forwarded to include it.
+    git(clone, "checkout", "-q", "main")
+    git(clone, "commit", "-q", "--allow-empty", "-m", "local")
+    git(clone, "checkout", "-q", "topic")
+    monkeypatch.chdir(clone)
+
+    with open(temp_configfile, "w") as f:
+        json.dump({"FORK_NAME": "fork"}, f)
+    runner = CliRunner()
+    config = Config()
+    config.configfile = temp_configfile
+    result = runner.invoke(getback, [], obj=config)
+    if result.exception:
+        raise result.exception
+    assert "Couldn't fast-forward main" in result.output
+    assert config.repo.active_branch.name == "main"
+    assert "topic" not in config.repo.heads
@@ -1,14 +1,16 @@
 import re
 import json
+import datetime
 import getpass
 import urllib.parse
 
 import click
-import requests
 
+from gg import http_client
 from gg.utils import error_out, success_out, info_out
 from gg.state import read, update, remove
 from gg.main import cli, pass_config
+from gg.trace import traced
 
 GITHUB_URL = "https://api.github.com"
 
@@ -43,7 +45,7 @@ def token(config, token):
         token = getpass.getpass("GitHub API Token: ").strip()
     url = urllib.parse.urljoin(config.github_url, "/user")
     assert url.startswith("https://"), url
-    response = requests.get(url, headers={"Authorization": f"token {token}"})
+    response = http_client.get(url, headers={"Authorization": f"token {token}"})
     if response.status_code == 200:
         update(
             config.configfile,
@@ -73,10 +75,15 @@ def burn(config):
         error_out("No stored GitHub credentials")
 
 
-def get_title(config, org, repo, number):
+@traced()
+def get_title(config, org, repo, number, state=None, **kwargs):
+    """Return the title and URL of the issue, or (None, None). The `state`
+    can be passed in if it's been read already, and any `kwargs` (e.g.
+    timeout) are passed on to the request."""
     base_url = GITHUB_URL
     headers = {}
-    state = read(config.configfile)
+    if state is None:
+        state = read(config.configfile)
     credentials = state.get("GITHUB")
     if credentials:
         base_url = state["GITHUB"]["github_url"]
@@ -87,7 +94,8 @@ def get_title(config, org, repo, number):
     if config.verbose:
         info_out(f"GitHub URL: {url}")
     assert url.startswith("https://"), url
-    response = requests.get(url, headers=headers)
+    response = http_client.cached_get(url, headers=headers, **kwargs)
+    report_rate_limit(config, response)
     response.raise_for_status()
     if response.status_code == 200:
         data = response.json()
@@ -123,7 +131,7 @@ def test(config, issue_url):
     else:
         url = urllib.parse.urljoin(credentials["github_url"], "/user")
         assert url.startswith("https://"), url
-        response = requests.get(
+        response = http_client.get(
             url, headers={"Authorization": f"token {credentials['token']}"}
         )
         if response.status_code == 200:
@@ -132,6 +140,48 @@ def test(config, issue_url):
             error_out(f"Failed to query - {response.status_code} ({response.json()})")
 
 
+def report_rate_limit(config, response):
+    rate_limit = http_client.get_rate_limit(response)
+    if config.verbose and "X-RateLimit-Remaining" in rate_limit:
+        info_out(
+            f"GitHub rate limit: {rate_limit['X-RateLimit-Remaining']} of "
+            f"{rate_limit.get('X-RateLimit-Limit', '?')} requests left"
+        )
+
+
+@github.command()
+@click.option("--stats", is_flag=True, help="Show what's cached (the default)")
+@click.option("--clear", is_flag=True, help="Delete everything cached")
+@pass_config
+def cache(config, stats, clear):
+    """Show or clear the cache of GitHub API responses."""
+    if clear:
+        http_client.clear_cache()
+        success_out("Cache cleared")
+        if not stats:
+            return
+
+    entries = http_client.get_cache_entries()
+    size = sum(size for _, size, _ in entries)
+    info_out(f"Directory: {http_client.get_cache_directory()}")
+    info_out(
+        f"Entries: {len(entries)} "
+        f"({size / 1024:.1f}KB of max {http_client.CACHE_MAX_SIZE / 1024:.0f}KB)"
+    )
+    recorded = http_client.get_stats()
+    info_out(f"Fetched: {recorded.get('fetched', 0)}")
+    info_out(f"Revalidated (304 Not Modified): {recorded.get('revalidated', 0)}")
+    rate_limit = recorded.get("rate_limit")
+    if rate_limit:
+        seen = datetime.datetime.fromtimestamp(recorded["rate_limit_seen"])
+        info_out(f"Rate limit, as of {seen:%Y-%m-%d %H:%M:%S}:")
+        for header, value in rate_limit.items():
+            if header == "X-RateLimit-Reset":
+                value = f"{datetime.datetime.fromtimestamp(int(value))}"
+            info_out(f"\t{header}: {value}")
+
+
+@traced()
 def find_pull_requests(config, org, repo, **params):
     base_url = GITHUB_URL
     headers = {}
@@ -146,11 +196,13 @@ def find_pull_requests(config, org, repo, **params):
     if config.verbose:
         info_out(f"GitHub URL: {url}")
     assert url.startswith("https://"), url
-    response = requests.get(url, params, headers=headers)
+    response = http_client.cached_get(url, params=params, headers=headers)
+    report_rate_limit(config, response)
     if response.status_code == 200:
         return response.json()
 
 
+@traced()
 def get_pull_request(config, org, repo, number):
     base_url = GITHUB_URL
     headers = {}
@@ -164,6 +216,7 @@ def get_pull_request(config, org, repo, number):
     if config.verbose:
         info_out(f"GitHub URL: {url}")
     assert url.startswith("https://"), url
-    response = requests.get(url, headers=headers)
+    response = http_client.cached_get(url, headers=headers)
+    report_rate_limit(config, response)
     if response.status_code == 200:
         return response.json()
@@ -4,6 +4,7 @@ import os
 import click
 
 from gg.state import load_config, update_config
+from gg.status import enable_speedups, get_speedups
 from gg.main import cli, pass_config
 
 
@@ -25,12 +26,19 @@ from gg.main import cli, pass_config
     default=None,
     help=f"Toggles if branches should prefix by your username ({os.getlogin()})",
 )
+@click.option(
+    "--fast-status",
+    is_flag=True,
+    default=False,
+    help="Make git's status checks faster in a big repo (fsmonitor etc.)",
+)
 @pass_config
 def local_config(
     config,
     push_to_origin="",
     toggle_fixes_message=False,
     toggle_username_branches=None,
+    fast_status=False,
 ):
     """Setting configuration options per repo name"""
     if push_to_origin:
@@ -64,3 +72,9 @@ def local_config(
         new_value = not before
         update_config(config.configfile, username_branches=new_value)
         print(f"username_branches after:  {new_value}")
+
+    if fast_status:
+        for key, value in get_speedups(config.repo).items():
+            print(f"{key} before: {value or 'not set'}")
+        for key, value in enable_speedups(config.repo).items():
+            print(f"{key} after:  {value or 'not available'}")
@@ -1,6 +1,8 @@
 from gg.main import cli, pass_config
 from gg.state import read
-from gg.utils import error_out, get_default_branch, success_out
+from gg.status import Status
+from gg.refs import fast_forward
+from gg.utils import error_out, get_default_branch, success_out, warning_out
 
 
 @cli.command()
@@ -11,19 +13,15 @@ def mastermerge(config):
 
     state = read(config.configfile)
     origin_name = state.get("ORIGIN_NAME", "origin")
-    default_branch = get_default_branch(repo, origin_name)
+    default_branch = get_default_branch(repo, origin_name, state.get("DEFAULT_BRANCH"))
 
     active_branch = repo.active_branch
     if active_branch.name == default_branch:
         error_out(f"You're already on the {default_branch} branch.")
-    active_branch_name = active_branch.name
 
-    if repo.is_dirty():
-        error_out(
-            'Repo is "dirty". ({})'.format(
-                ", ".join([repr(x.b_path) for x in repo.index.diff(None)])
-            )
-        )
+    status = Status(repo, untracked_files="no", renames=False)
+    if status.dirty:
+        error_out('Repo is "dirty". ({})'.format(", ".join(map(repr, status.changed))))
 
     upstream_remote = None
     for remote in repo.remotes:
@@ -33,10 +31,12 @@ def mastermerge(config):
     if not upstream_remote:
         error_out(f"No remote called {origin_name!r} found")
 
-    repo.heads[default_branch].checkout()
-    repo.remotes[origin_name].pull(default_branch)
-
-    repo.heads[active_branch_name].checkout()
+    # No need to check out the default branch to update it
+    if not fast_forward(repo, origin_name, default_branch):
+        warning_out(
+            f"Couldn't fast-forward {default_branch} to "
+            f"{origin_name}/{default_branch}. Using it as is."
+        )
 
     repo.git.merge(default_branch)
     success_out(f"Merged against {origin_name}/{default_branch}")
@@ -1,5 +1,6 @@
 from gg.utils import error_out, info_out, success_out
 from gg.state import read
+from gg.status import Status
 from gg.main import cli, pass_config
 
 
@@ -16,12 +17,9 @@ def merge(config):
     if active_branch.name == default_branch:
         error_out(f"You're already on the {default_branch} branch.")
 
-    if repo.is_dirty():
-        error_out(
-            'Repo is "dirty". ({})'.format(
-                ", ".join([repr(x.b_path) for x in repo.index.diff(None)])
-            )
-        )
+    status = Status(repo, untracked_files="no", renames=False)
+    if status.dirty:
+        error_out('Repo is "dirty". ({})'.format(", ".join(map(repr, status.changed))))
 
     branch_name = active_branch.name
 
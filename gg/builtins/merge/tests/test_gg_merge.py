@@ -33,7 +33,7 @@ class MockDiff:
 
 
 def test_merge(temp_configfile, mocker):
-    rget = mocker.patch("requests.get")
+    rget = mocker.patch("gg.http_client.get")
 
     def mocked_get(url, params, headers):
         assert url.endswith("/peterbe/gg-example/pulls")
@@ -52,7 +52,7 @@ def test_merge(temp_configfile, mocker):
     mocked_remote = mocker.MagicMock()
     mocked_remote.name = "origin"
     mocked_git().remotes.__iter__.return_value = [mocked_remote]
-    mocked_git().is_dirty.return_value = False
+    mocked_git().git.status.return_value = ""
 
     mocked_git().heads.__iter__.return_value = [branch1]
 
@@ -20,7 +20,7 @@ def pr(config):
 
     state = read(config.configfile)
     origin_name = state.get("ORIGIN_NAME", "origin")
-    default_branch = get_default_branch(repo, origin_name)
+    default_branch = get_default_branch(repo, origin_name, state.get("DEFAULT_BRANCH"))
 
     active_branch = repo.active_branch
     if active_branch.name == default_branch:
@@ -1,5 +1,7 @@
-from gg.utils import error_out, success_out, info_out
+from gg.utils import error_out, success_out, info_out, warning_out
+from gg.refs import fast_forward
 from gg.state import read
+from gg.status import Status
 from gg.main import cli, pass_config
 
 
@@ -15,14 +17,10 @@ def rebase(config):
     active_branch = repo.active_branch
     if active_branch.name == default_branch:
         error_out(f"You're already on the {default_branch} branch.")
-    active_branch_name = active_branch.name
 
-    if repo.is_dirty():
-        error_out(
-            'Repo is "dirty". ({})'.format(
-                ", ".join([repr(x.b_path) for x in repo.index.diff(None)])
-            )
-        )
+    status = Status(repo, untracked_files="no", renames=False)
+    if status.dirty:
+        error_out('Repo is "dirty". ({})'.format(", ".join(map(repr, status.changed))))
 
     origin_name = state.get("ORIGIN_NAME", "origin")
     upstream_remote = None
@@ -33,10 +31,12 @@ def rebase(config):
     if not upstream_remote:
         error_out("No remote called {!r} found".format(origin_name))
 
-    repo.heads[default_branch].checkout()
-    repo.remotes[origin_name].pull(default_branch)
-
-    repo.heads[active_branch_name].checkout()
+    # No need to check out the default branch to update it
+    if not fast_forward(repo, origin_name, default_branch):
+        warning_out(
+            f"Couldn't fast-forward {default_branch} to "
+            f"{origin_name}/{default_branch}. Using it as is."
+        )
 
     print(repo.git.rebase(default_branch))
     success_out(f"Rebased against {origin_name}/{default_branch}")
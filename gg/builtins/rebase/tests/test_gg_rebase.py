@@ -33,7 +33,7 @@ def test_rebase(temp_configfile, mocker):
     mocked_remote = mocker.MagicMock()
     mocked_remote.name = "origin"
     mocked_git().remotes.__iter__.return_value = [mocked_remote]
-    mocked_git().is_dirty.return_value = False
+    mocked_git().git.status.return_value = ""
 
     state = json.load(open(temp_configfile))
     state["FORK_NAME"] = "peterbe"
@@ -52,4 +52,6 @@ def test_rebase(temp_configfile, mocker):
     assert result.exit_code == 0
     assert not result.exception
 
+    mocked_git().git.fetch.assert_called_with("origin", "master:master")
     mocked_git().git.rebase.assert_called_with("master")
+    mocked_git().heads["master"].checkout.assert_not_called()
@@ -2,8 +2,11 @@ import os
 import re
 import getpass
 import urllib
+import concurrent.futures
+import time
 
 import click
+import requests
 
 from gg.utils import error_out, info_out, is_github
 from gg.state import save, read, load_config
@@ -12,6 +15,10 @@ from gg.builtins import bugzilla
 from gg.builtins import github
 from gg.builtins.branches.gg_branches import find
 
+# How long (in seconds) to wait for all GitHub and Bugzilla lookups of a number
+LOOKUP_DEADLINE = 10
+MAX_LOOKUP_WORKERS = 8
+
 
 @cli.command()
 @click.argument("bugnumber", default="")
@@ -116,24 +123,26 @@ def get_summary(config, bugnumber):
         fork_name = state.get("FORK_NAME", getpass.getuser())
         if config.verbose:
             info_out("Using fork name: {}".format(fork_name))
-        candidates = []
         # Looping over the remotes, let's figure out which one
         # is the one that has issues. Let's try every one that isn't
-        # your fork remote.
+        # your fork remote. And Bugzilla. All at the same time.
+        lookups = []
         for origin in repo.remotes:
             if origin.name == fork_name:
                 continue
-            url = origin.url
-            org, repo = parse_remote_url(origin.url)
-            github_title, github_url = github.get_title(
-                config, org, repo, int(bugnumber)
-            )
-            if github_title:
-                candidates.append((github_title, int(bugnumber), github_url))
+            org, repo_name = parse_remote_url(origin.url)
+            lookups.append((github.get_title, config, org, repo_name, int(bugnumber)))
+        lookups.append((bugzilla.get_summary, config, bugnumber))
 
-        bugzilla_summary, bugzilla_url = bugzilla.get_summary(config, bugnumber)
-        if bugzilla_summary:
-            candidates.append((bugzilla_summary, int(bugnumber), bugzilla_url))
+        candidates = []
+        # Only what the lookups need, as a plain dict, because the state's
+        # backend (e.g. a SQLite connection) can't be used in their threads
+        credentials = {
+            key: state[key] for key in ("GITHUB", "BUGZILLA") if key in state
+        }
+        for title, url in run_lookups(config, lookups, credentials):
+            if title:
+                candidates.append((title, int(bugnumber), url))
 
         if len(candidates) > 1:
             info_out(
@@ -153,6 +162,48 @@ def get_summary(config, bugnumber):
     return bugnumber, None, None
 
 
+def run_lookups(config, lookups, credentials):
+    """Call each `(function, *args)` in a thread and return the results,
+    in the same order, of those that succeeded within LOOKUP_DEADLINE
+    seconds.
+
+    The functions are passed the `credentials` from the state, as `state`,
+    because the threads can't use the command's state session, and what's
+    left of the deadline as the timeout of their requests."""
+    deadline = time.monotonic() + LOOKUP_DEADLINE
+
+    def lookup(function, *args):
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            return None, None
+        # No retries, because there wouldn't be time for them
+        return function(*args, state=credentials, timeout=timeout, retries=0)
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(len(lookups), MAX_LOOKUP_WORKERS)
+    )
+    futures = [executor.submit(lookup, *lookup_) for lookup_ in lookups]
+    done, not_done = concurrent.futures.wait(futures, timeout=LOOKUP_DEADLINE)
+    for future in not_done:
+        # The ones that have already started can't be stopped, but their
+        # requests time out at the deadline, and we don't wait for them here.
+        future.cancel()
+    executor.shutdown(wait=False)
+    if not_done:
+        info_out(f"Gave up on {len(not_done)} lookup(s) after {LOOKUP_DEADLINE}s")
+
+    results = []
+    for future in futures:
+        if future not in done:
+            continue
+        try:
+            results.append(future.result())
+        except requests.RequestException as exception:
+            if config.verbose:
+                info_out(f"Lookup failed: {exception}")
+    return results
+
+
 def parse_remote_url(url):
     """return a tuple of (org, repo) from the remote git URL"""
     # The URL will either be git@github.com:org/repo.git or
@@ -2,6 +2,7 @@ import json
 import os
 import tempfile
 import shutil
+import threading
 
 import pytest
 import requests_mock
@@ -11,9 +12,10 @@ from click.testing import CliRunner
 # but the entry points loading inside gg.main.
 # An alternative would we to set `PYTHONPATH=. py.test` (or something)
 # but then that wouldn't test the entry point loading.
+from gg import state
 from gg.main import Config
 
-from gg.builtins.start.gg_start import start, parse_remote_url
+from gg.builtins.start.gg_start import start, get_summary, parse_remote_url
 
 
 @pytest.fixture(autouse=True)
@@ -45,6 +47,8 @@ def temp_configfile():
 def test_start(temp_configfile, mocker):
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git.for_each_ref.return_value = ""
 
     runner = CliRunner()
     config = Config()
@@ -67,6 +71,8 @@ def test_start(temp_configfile, mocker):
 def test_start_weird_description(temp_configfile, mocker):
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git.for_each_ref.return_value = ""
 
     runner = CliRunner()
     config = Config()
@@ -91,6 +97,8 @@ def test_start_weird_description(temp_configfile, mocker):
 def test_start_a_digit(temp_configfile, mocker, requestsmock):
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git.for_each_ref.return_value = ""
 
     remotes = []
 
@@ -152,6 +160,50 @@ def test_start_a_digit(temp_configfile, mocker, requestsmock):
     assert result.exit_code == 1
 
 
+def test_start_a_digit_sqlite(temp_configfile, mocker, requestsmock):
+    # The lookups run in threads, which can't use the SQLite connection
+    configfile = os.path.join(os.path.dirname(temp_configfile), "state.sqlite3")
+    mocked_git = mocker.patch("git.Repo")
+    mocked_git().working_dir = "gg-start-test"
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git.for_each_ref.return_value = ""
+    origin = mocker.MagicMock()
+    origin.name = "origin"
+    origin.url = "git@github.com:myorg/myrepo.git"
+    mocked_git().remotes = [origin]
+
+    requestsmock.get(
+        "https://bugs.example.com/rest/bug/",
+        json={"bugs": [{"id": 1234, "summary": "This is the summary"}]},
+    )
+    requestsmock.get(
+        "https://github.example.com/repos/myorg/myrepo/issues/1234", status_code=404
+    )
+
+    runner = CliRunner()
+    config = Config()
+    config.configfile = configfile
+    state.update(
+        configfile,
+        {
+            "GITHUB": {
+                "github_url": "https://github.example.com",
+                "token": "secret",
+                "login": "peterbe",
+            },
+            "BUGZILLA": {"bugzilla_url": "https://bugs.example.com", "api_key": "x"},
+        },
+    )
+    result = runner.invoke(start, ["1234"], input="\n", obj=config)
+    if result.exception:
+        raise result.exception
+    mocked_git().create_head.assert_called_with("1234-this-is-the-summary")
+    (bugzilla_request,) = [
+        r for r in requestsmock.request_history if r.hostname == "bugs.example.com"
+    ]
+    assert bugzilla_request.qs["api_key"] == ["x"]
+
+
 def test_start_github_issue(temp_configfile, mocker, requestsmock):
 
     requestsmock.get(
@@ -165,6 +217,8 @@ def test_start_github_issue(temp_configfile, mocker, requestsmock):
     )
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git.for_each_ref.return_value = ""
 
     runner = CliRunner()
     config = Config()
@@ -211,6 +265,8 @@ def test_start_bugzilla_url(temp_configfile, mocker, requestsmock):
     )
     mocked_git = mocker.patch("git.Repo")
     mocked_git().working_dir = "gg-start-test"
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git.for_each_ref.return_value = ""
 
     runner = CliRunner()
     config = Config()
@@ -245,3 +301,43 @@ def test_parse_remote_url():
     org, repo = parse_remote_url("https://github.com/org/repo.git")
     assert org == "org"
     assert repo == "repo"
+
+
+def test_get_summary_deadline(temp_configfile, mocker):
+    mocked_git = mocker.patch("git.Repo")
+    mocked_git().working_dir = "gg-start-test"
+    mocked_git().common_dir = os.path.dirname(temp_configfile)
+    mocked_git().git.for_each_ref.return_value = ""
+    origin = mocker.MagicMock()
+    origin.name = "origin"
+    origin.url = "git@github.com:myorg/myrepo.git"
+    mocked_git().remotes = [origin]
+    mocker.patch("gg.builtins.start.gg_start.LOOKUP_DEADLINE", 0.1)
+    event = threading.Event()
+
+    def slow_get_title(*args, **kwargs):
+        event.wait(5)
+        return "Too late", "https://github.com/myorg/myrepo/issues/1234"
+
+    mocker.patch("gg.builtins.github.get_title", slow_get_title)
+    bugzilla_summary = mocker.patch("gg.builtins.bugzilla.get_summary")
+    bugzilla_summary.return_value = (
+        "This is the summary",
+        "https://bugzilla.mozilla.org/show_bug.cgi?id=1234",
+    )
+
+    config = Config()
+    config.configfile = temp_configfile
+    try:
+        summary, bugnumber, url = get_summary(config, "1234")
+    finally:
+        event.set()
+    assert summary == "This is the summary"
+    assert bugnumber == 1234
+    assert url == "https://bugzilla.mozilla.org/show_bug.cgi?id=1234"
+    # The state isn't read again in the thread, and the request can't take
+    # longer than the deadline
+    _, kwargs = bugzilla_summary.call_args
+    assert kwargs["state"] == {}
+    assert 0 < kwargs["timeout"] <= 0.1
+    assert kwargs["retries"] == 0
@@ -0,0 +1,36 @@
+import json
+import os
+import tempfile
+
+
+def get_cache_dir():
+    """Return the directory where gg keeps things that are safe to lose.
+    It can be overridden with the $GG_CACHE_DIR environment variable."""
+    directory = os.environ.get("GG_CACHE_DIR")
+    if not directory:
+        directory = os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+            "gg",
+        )
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def read(name, default=None):
+    try:
+        with open(os.path.join(get_cache_dir(), name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write(name, data):
+    # It's just a cache, so never let failing to write it break a command.
+    try:
+        directory = get_cache_dir()
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, os.path.join(directory, name))
+    except OSError:
+        pass
@@ -0,0 +1,131 @@
+"""Shell completion (see gg-complete.sh) that doesn't have to import every
+command, and with them GitPython and requests, on every TAB.
+
+All the commands, subcommands and their options are written down in the
+cache the first time, and again whenever a plugin is installed or
+uninstalled. The names of the branches come from the branch index (see
+gg.refs.get_branch_index()), which is rebuilt whenever a ref changes.
+"""
+
+import os
+import shlex
+import subprocess
+import sys
+
+import click
+
+from . import cache
+from .plugins import get_index_key
+from .refs import get_branch_index
+
+COMMAND_TREE_NAME = "completion.json"
+# Commands whose arguments are (or search for) branch names
+BRANCH_COMMANDS = ("branches", "cleanup")
+
+
+class GitDir:
+    """Just enough of a git.Repo for gg.refs.get_branch_index(), run with
+    plain subprocess."""
+
+    def __init__(self, common_dir):
+        self.common_dir = common_dir
+        self.git = self
+
+    @classmethod
+    def find(cls):
+        process = subprocess.run(
+            ["git", "rev-parse", "--git-common-dir"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+        if process.returncode:
+            return None  # not in a repo
+        return cls(os.path.abspath(process.stdout.strip()))
+
+    def for_each_ref(self, *args):
+        return subprocess.run(
+            ["git", "for-each-ref", *args],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        ).stdout.rstrip("\n")
+
+
+def complete(group):
+    """Print the completions for what's in $COMP_WORDS (up to $COMP_CWORD),
+    one per line, and exit."""
+    try:
+        words = shlex.split(os.environ.get("COMP_WORDS", ""))
+    except ValueError:  # e.g. an unclosed quote
+        words = os.environ.get("COMP_WORDS", "").split()
+    cword = int(os.environ.get("COMP_CWORD") or 0)
+    for completion in get_completions(group, words, cword):
+        print(completion)
+    sys.exit(0)
+
+
+def get_completions(group, words, cword):
+    args = words[1:cword]
+    incomplete = words[cword] if cword < len(words) else ""
+    node = get_command_tree(group)
+    path = []
+    takes_value = False
+    for arg in args:
+        if takes_value:
+            takes_value = False
+        elif arg.startswith("-"):
+            takes_value = node["options"].get(arg, False)
+        elif arg in node["commands"]:
+            node = node["commands"][arg]
+            path.append(arg)
+    if takes_value:
+        return []  # it's not known what an option's value can be
+    if incomplete.startswith("-"):
+        candidates = list(node["options"])
+    elif node["commands"]:
+        candidates = list(node["commands"])
+    elif path and path[-1] in BRANCH_COMMANDS:
+        candidates = get_branch_names()
+    else:
+        candidates = []
+    return sorted(c for c in candidates if c.startswith(incomplete))
+
+
+def get_command_tree(group):
+    """Return a dict of the 'options' (whether each one takes a value) and
+    'commands' (the same again, for each one) of the `group`."""
+    key = get_index_key()
+    cached = cache.read(COMMAND_TREE_NAME)
+    if cached and cached.get("key") == key:
+        return cached["tree"]
+    tree = describe(click.Context(group, info_name="gg"), group)
+    cache.write(COMMAND_TREE_NAME, {"key": key, "tree": tree})
+    return tree
+
+
+def describe(ctx, command):
+    options = {"--help": False}
+    for param in command.get_params(ctx):
+        if not isinstance(param, click.Option):
+            continue
+        for opt in param.opts + param.secondary_opts:
+            options[opt] = not (param.is_flag or param.count)
+    commands = {}
+    if hasattr(command, "list_commands"):
+        for name in command.list_commands(ctx):
+            subcommand = command.get_command(ctx, name)
+            if subcommand is not None and not subcommand.hidden:
+                commands[name] = describe(ctx, subcommand)
+    return {"options": options, "commands": commands}
+
+
+def get_branch_names():
+    git_dir = GitDir.find()
+    if git_dir is None:
+        return []
+    return [
+        refname.split("/", 2)[2]
+        for refname, _, _ in get_branch_index(git_dir)
+        if refname.startswith("refs/heads/")
+    ]
@@ -0,0 +1,313 @@
+"""The `ggd` command: like `gg`, but the command runs in a background
+process that already has gg, click, GitPython and requests imported (and
+the config file parsed), instead of in a brand new Python interpreter.
+
+The background process (the daemon) is started by the first `ggd`, listens
+on a Unix socket in the cache directory and goes away by itself when it
+hasn't been used for a while. For every command it forks. The `ggd` client
+sends it its arguments, working directory and environment variables, and
+its stdin, stdout and stderr (file descriptors, not their content). So the
+command can prompt and print to the terminal as if it was run directly.
+Ctrl-C is passed on to the command and its exit code passed back.
+
+Each command still opens its own git.Repo, because the `git cat-file`
+processes GitPython keeps open can't be shared by commands running at the
+same time.
+"""
+
+import array
+import json
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+import traceback
+
+from . import cache
+from .plugins import get_index_key
+
+# Seconds without a command before the daemon exits
+IDLE_TIMEOUT = 60 * 10
+# Seconds to wait for a daemon that was just started to accept connections
+CONNECT_TIMEOUT = 5
+# Named after what's installed, so that installing something (e.g. a new
+# version of gg) means a new daemon.
+SOCKET_NAME = "daemon-{}.sock"
+LOG_NAME = "daemon.log"
+# Longer paths than this don't fit in a sockaddr_un on every platform
+MAX_SOCKET_PATH_LENGTH = 100
+FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT")
+
+
+def is_supported():
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "fork")
+
+
+def get_socket_path():
+    return os.path.join(cache.get_cache_dir(), SOCKET_NAME.format(get_index_key()[:16]))
+
+
+def client(argv=None):
+    """Run a gg command in the daemon, starting it if it's not running. If
+    that can't be done, the command runs right here, like `gg` would."""
+    argv = sys.argv[1:] if argv is None else argv
+    connection = None
+    if is_supported() and not os.environ.get("GG_NO_DAEMON"):
+        path = get_socket_path()
+        if len(path.encode("utf-8")) <= MAX_SOCKET_PATH_LENGTH:
+            connection = connect(path)
+    if connection is None:
+        from .main import cli
+
+        cli.main(args=argv, prog_name="gg")
+    with connection:
+        sys.exit(run(connection, argv))
+
+
+def connect(path, timeout=CONNECT_TIMEOUT):
+    """Return a socket connected to the daemon, or None if there isn't one
+    and one can't be started."""
+    deadline = time.monotonic() + timeout
+    started = False
+    while True:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(path)
+            return connection
+        except OSError:
+            connection.close()
+        if not started:
+            start(path)
+            started = True
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.01)
+
+
+def start(path):
+    with open(os.path.join(cache.get_cache_dir(), LOG_NAME), "a") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "gg.daemon", path],
+            # Not wherever we are, which could have something called gg in it
+            cwd="/",
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+
+def run(connection, argv):
+    """Have the daemon run the command and return its exit code."""
+    request = json.dumps(
+        {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    ).encode("utf-8")
+    fds = array.array("i", [0, 1, 2])
+    connection.sendmsg(
+        [struct.pack("!I", len(request))],
+        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)],
+    )
+    connection.sendall(request)
+    pid = receive_int(connection)
+    if pid is None:
+        return 1
+
+    # Ctrl-C in the terminal is sent to us, not to the process running the
+    # command.
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    for name in FORWARDED_SIGNALS:
+        signal.signal(getattr(signal, name), forward)
+    exit_code = receive_int(connection)
+    return 1 if exit_code is None else exit_code
+
+
+def receive_int(connection):
+    data = b""
+    while len(data) < 4:
+        chunk = connection.recv(4 - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return struct.unpack("!i", data)[0]
+
+
+def receive_request(connection):
+    """Return the request and the 3 file descriptors a client sent."""
+    size = struct.calcsize("i")
+    header, ancillary, _, _ = connection.recvmsg(4, socket.CMSG_LEN(3 * size))
+    fds = array.array("i")
+    for level, type_, data in ancillary:
+        if level == socket.SOL_SOCKET and type_ == socket.SCM_RIGHTS:
+            # Anything but whole ints would be a truncated message
+            whole = len(data) - len(data) % size
+            fds.frombytes(data[:whole])
+    if len(header) != 4 or len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        raise ValueError("Not a request")
+    (length,) = struct.unpack("!I", header)
+    data = b""
+    while len(data) < length:
+        chunk = connection.recv(length - len(data))
+        if not chunk:
+            break
+        data += chunk
+    try:
+        return json.loads(data.decode("utf-8")), list(fds)
+    except ValueError:
+        for fd in fds:
+            os.close(fd)
+        raise
+
+
+def is_same_user(connection):
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True  # the socket being 0600 will have to do
+    credentials = connection.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid == os.getuid()
+
+
+def warm_up():
+    """Import every command, so that no command has to."""
+    from .main import cli
+
+    for name in cli.list_commands(None):
+        try:
+            cli.get_command(None, name)
+        except Exception:
+            # The command will fail, and say why, when it's used
+            traceback.print_exc()
+
+
+def preload_state(env):
+    from .main import DEFAULT_CONFIGFILE
+    from .state import preload
+
+    preload(env.get("GG_CONFIGFILE") or DEFAULT_CONFIGFILE)
+
+
+def serve(path, idle_timeout=IDLE_TIMEOUT):
+    import fcntl
+
+    # Only one daemon per socket, even if two clients start one at once
+    lock = open(path + ".lock", "a+")
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+    lock.truncate(0)
+    lock.write(str(os.getpid()))
+    lock.flush()
+    # So that the finally clauses get to clean up
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        warm_up()
+        preload_state(os.environ)
+        if os.path.exists(path):
+            os.remove(path)  # left behind by a daemon that was killed
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        try:
+            os.chmod(path, 0o600)
+            server.listen(16)
+            server.settimeout(idle_timeout)
+            accept_commands(server, lock)
+        finally:
+            server.close()
+            os.remove(path)
+    finally:
+        os.remove(path + ".lock")
+        lock.close()
+
+
+def accept_commands(server, lock):
+    """Fork for every command until there hasn't been one for a while."""
+    children = set()
+    while True:
+        children = {pid for pid in children if not has_exited(pid)}
+        try:
+            connection, _ = server.accept()
+        except socket.timeout:
+            if children:
+                continue
+            return
+        try:
+            if not is_same_user(connection):
+                continue
+            connection.settimeout(None)
+            request, fds = receive_request(connection)
+            pid = os.fork()
+            if not pid:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                server.close()
+                lock.close()
+                os._exit(run_command(connection, request, fds))
+            children.add(pid)
+            for fd in fds:
+                os.close(fd)
+        except (OSError, ValueError):
+            traceback.print_exc()
+            continue
+        finally:
+            connection.close()
+        # For the next command
+        preload_state(request["env"])
+
+
+def has_exited(pid):
+    try:
+        return os.waitpid(pid, os.WNOHANG)[0] != 0
+    except ChildProcessError:
+        return True
+
+
+def run_command(connection, request, fds):
+    """Run the command, in the forked process, as if it had been run in the
+    client's terminal. Return its exit code."""
+    for number, fd in enumerate(fds):
+        os.dup2(fd, number)
+        os.close(fd)
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = open(2, "w", buffering=1, errors="backslashreplace", closefd=False)
+    os.environ.clear()
+    os.environ.update(request["env"])
+
+    from .main import cli
+
+    exit_code = 1
+    try:
+        connection.sendall(struct.pack("!i", os.getpid()))
+        os.chdir(request["cwd"])
+        cli.main(args=request["argv"], prog_name="gg")
+        exit_code = 0
+    except SystemExit as exception:
+        if exception.code is None or isinstance(exception.code, int):
+            exit_code = exception.code or 0
+        else:
+            print(exception.code, file=sys.stderr)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    try:
+        connection.sendall(struct.pack("!i", exit_code))
+    except OSError:
+        pass  # the client is gone
+    return exit_code
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
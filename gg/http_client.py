@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import cache
+
+# Seconds to wait for the server, unless $GG_HTTP_TIMEOUT says otherwise
+DEFAULT_TIMEOUT = 10
+# Retry these (with exponential backoff and respecting any Retry-After)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRIES = 3
+
+# Where cached_get() keeps responses, in the cache directory, and how much
+# space they may take before the least recently used ones are evicted.
+CACHE_DIRECTORY_NAME = "http"
+CACHE_MAX_SIZE = 10 * 1024 * 1024
+STATS_NAME = "http-stats.json"
+RATE_LIMIT_HEADERS = (
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+    "X-RateLimit-Used",
+    "X-RateLimit-Resource",
+)
+
+# The sessions by how many times they retry
+_sessions = {}
+
+
+def get_timeout():
+    return float(os.environ.get("GG_HTTP_TIMEOUT") or DEFAULT_TIMEOUT)
+
+
+def get_session(retries=RETRIES):
+    """Return the one requests session that all GitHub and Bugzilla calls
+    share, so that connections (and their TLS handshakes) are pooled and
+    kept alive between calls. One for each number of `retries`, that is."""
+    if retries not in _sessions:
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _sessions[retries] = session
+    return _sessions[retries]
+
+
+def get(url, retries=RETRIES, **kwargs):
+    kwargs.setdefault("timeout", get_timeout())
+    return get_session(retries).get(url, **kwargs)
+
+
+def get_cache_directory():
+    directory = os.path.join(cache.get_cache_dir(), CACHE_DIRECTORY_NAME)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def get_cache_path(url, headers):
+    # Different tokens can see different things, so they get different
+    # entries. The token itself is never stored.
+    identity = headers.get("Authorization", "")
+    key = hashlib.sha256(f"{identity}\n{url}".encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_directory(), f"{key}.json")
+
+
+def cached_get(url, params=None, headers=None, **kwargs):
+    """Like get() but responses with an ETag or Last-Modified are stored on
+    disk, and the next time the same URL is requested (with the same
+    Authorization) it's only revalidated. GitHub doesn't count a
+    "304 Not Modified" against the rate limit."""
+    url = requests.Request("GET", url, params=params).prepare().url
+    headers = dict(headers or {})
+    path = get_cache_path(url, headers)
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = None
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = get(url, headers=headers, **kwargs)
+    stats = {"rate_limit": get_rate_limit(response)}
+    if cached and response.status_code == 304:
+        try:
+            os.utime(path)  # it's been used, so keep it around longer
+        except OSError:
+            pass
+        stats["revalidated"] = 1
+        response = make_response(cached, response)
+    else:
+        stats["fetched"] = 1
+        if response.status_code == 200:
+            store(path, response)
+    update_stats(stats)
+    return response
+
+
+def make_response(cached, not_modified):
+    response = requests.Response()
+    response.status_code = cached["status_code"]
+    response.headers.update(cached["headers"])
+    response.headers.update(not_modified.headers)
+    response._content = cached["content"].encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = not_modified.url
+    response.request = not_modified.request
+    response.elapsed = not_modified.elapsed
+    return response
+
+
+def store(path, response):
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return  # can't be revalidated so there's no point
+    entry = {
+        "url": response.url,
+        "status_code": response.status_code,
+        "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+        "etag": etag,
+        "last_modified": last_modified,
+        "content": response.text,
+    }
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+        evict()
+    except OSError:
+        pass
+
+
+def get_cache_entries():
+    """Return a list of (path, size, last used) of everything cached."""
+    entries = []
+    with os.scandir(get_cache_directory()) as it:
+        for entry in it:
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def evict(max_size=None):
+    """Delete the least recently used entries until they fit in max_size."""
+    if max_size is None:
+        max_size = CACHE_MAX_SIZE
+    entries = get_cache_entries()
+    total = sum(size for _, size, _ in entries)
+    for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def clear_cache():
+    evict(max_size=0)
+    try:
+        os.remove(os.path.join(cache.get_cache_dir(), STATS_NAME))
+    except OSError:
+        pass
+
+
+def get_rate_limit(response):
+    rate_limit = {}
+    for header in RATE_LIMIT_HEADERS:
+        if header in response.headers:
+            rate_limit[header] = response.headers[header]
+    return rate_limit
+
+
+def update_stats(stats):
+    # Only roughly. Two commands at the same time might lose a count.
+    previous = get_stats()
+    for key in ("fetched", "revalidated"):
+        stats[key] = previous.get(key, 0) + stats.get(key, 0)
+    if stats["rate_limit"]:
+        stats["rate_limit_seen"] = time.time()
+    else:
+        stats["rate_limit"] = previous.get("rate_limit", {})
+        stats["rate_limit_seen"] = previous.get("rate_limit_seen")
+    cache.write(STATS_NAME, stats)
+
+
+def get_stats():
+    return cache.read(STATS_NAME, {})
@@ -1,21 +1,76 @@
 import os
-from pkg_resources import iter_entry_points
 
 import click
-import git
-
-from . import state
-from .utils import error_out, get_repo
 
+from .plugins import get_plugins, import_object
 
 DEFAULT_CONFIGFILE = os.path.expanduser("~/.gg.json")
 
+# All the builtin commands, and the module that implements each one, along
+# with their short help. Knowing this up front means we don't have to import
+# every builtin (and with them GitPython and requests) just to run one
+# command or to print the --help.
+# Remember to keep the help text in sync with the command's docstring.
+BUILTIN_COMMANDS = {
+    "branches": (
+        "gg.builtins.branches.gg_branches",
+        "List all branches. And if exactly 1 found, offer to check it out.",
+    ),
+    "bugzilla": (
+        "gg.builtins.bugzilla",
+        "General tool for connecting to Bugzilla.",
+    ),
+    "cleanup": (
+        "gg.builtins.cleanup.gg_cleanup",
+        "Deletes a found branch locally and remotely.",
+    ),
+    "commit": (
+        "gg.builtins.commit.gg_commit",
+        "Commit the current branch with all files.",
+    ),
+    "config": ("gg.builtins.config", "Setting various configuration options"),
+    "getback": (
+        "gg.builtins.getback.gg_getback",
+        "Goes back to the default branch, deletes the current branch locally "
+        "and remotely.",
+    ),
+    "github": ("gg.builtins.github", "For setting up a GitHub API token."),
+    "local-config": (
+        "gg.builtins.local_config",
+        "Setting configuration options per repo name",
+    ),
+    "mastermerge": (
+        "gg.builtins.mastermerge.gg_mastermerge",
+        "Merge the origin_name/default_branch into the the current branch",
+    ),
+    "merge": (
+        "gg.builtins.merge.gg_merge",
+        "Merge the current branch into $default_branch.",
+    ),
+    "pr": ("gg.builtins.pr.gg_pr", "Find PRs based on the current branch"),
+    "push": ("gg.builtins.push.gg_push", "Create push the current branch."),
+    "rebase": (
+        "gg.builtins.rebase.gg_rebase",
+        "Rebase the current branch against $origin/$branch",
+    ),
+    "start": ("gg.builtins.start.gg_start", "Create a new topic branch."),
+}
+
 
 class Config:
     def __init__(self):
+        # Imported here so that merely importing this module (e.g. for
+        # `gg --help`) doesn't have to import GitPython.
+        import git
+        from .utils import error_out, get_repo
+
         self.verbose = False  # default
         self.configfile = DEFAULT_CONFIGFILE
+        # Config file name to gg.state.Session, for the duration of a command
+        self.state_sessions = {}
         try:
+            # The one repo handle for the whole command. See
+            # gg.utils.get_current_repo().
             self.repo = get_repo()
         except git.InvalidGitRepositoryError as exception:
             error_out(f"{exception.args[0]} is not a git repository")
@@ -24,42 +79,122 @@ class Config:
 pass_config = click.make_pass_decorator(Config, ensure=True)
 
 
-@click.group()
+class LazyGroup(click.Group):
+    """A click group that knows the names of its commands up front but only
+    imports the module implementing a command when that command is needed.
+    The modules register themselves with the group (e.g. `@cli.command()`)
+    when imported."""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Maps command name to a tuple of (what to import, short help)
+        self.lazy_commands = dict(lazy_commands or {})
+        self._plugins_loaded = False
+
+    def main(self, *args, **kwargs):
+        if os.environ.get("_GG_COMPLETE") == "complete":
+            # Without importing and running everything, which is too slow
+            # to do on every TAB.
+            from .completion import complete
+
+            complete(self)
+        return super().main(*args, **kwargs)
+
+    def list_commands(self, ctx):
+        self.load_plugins()
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        self.load_plugins()
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            import_object(self.lazy_commands[cmd_name][0])
+        return self.commands.get(cmd_name)
+
+    def load_plugins(self):
+        """Make the commands of all installed plugins known to the group.
+        Thanks to the plugin index, they don't need to be imported
+        until one of their commands is used."""
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+        for plugin in get_plugins(self):
+            if plugin["commands"]:
+                for name, help in plugin["commands"].items():
+                    self.lazy_commands.setdefault(name, (plugin["value"], help))
+            else:
+                # E.g. a plugin that only adds a command to one of the
+                # builtin groups. No way of knowing when it's needed.
+                import_object(plugin["value"])
+
+    def format_commands(self, ctx, formatter):
+        """Like click.Group.format_commands but uses the known short help
+        for the commands that haven't been imported."""
+        names = [
+            name
+            for name in self.list_commands(ctx)
+            if name not in self.commands or not self.commands[name].hidden
+        ]
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            if name in self.commands:
+                help = self.commands[name].get_short_help_str(limit)
+            else:
+                help = click.utils.make_default_short_help(
+                    self.lazy_commands[name][1], limit
+                )
+            rows.append((name, help))
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_commands=BUILTIN_COMMANDS)
 @click.option("-v", "--verbose", is_flag=True)
 @click.option(
     "-c",
     "--configfile",
     default=DEFAULT_CONFIGFILE,
-    help=f"Path to the config file (default: {DEFAULT_CONFIGFILE})",
+    envvar="GG_CONFIGFILE",
+    help=(
+        f"Path to the config file (default: {DEFAULT_CONFIGFILE}). "
+        "Make it a .sqlite3 file to store everything in SQLite."
+    ),
+)
+@click.option(
+    "--trace",
+    is_flag=True,
+    envvar="GG_TRACE",
+    help=(
+        "Print how long every git command, HTTP request and read or write of "
+        "the config file took."
+    ),
+)
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False),
+    envvar="GG_TRACE_FILE",
+    help="Write the same as a Chrome trace (see chrome://tracing) to this file.",
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False),
+    envvar="GG_PROFILE",
+    help="Profile the command and write the cProfile stats to this file.",
 )
 @pass_config
-def cli(config, configfile, verbose):
+def cli(config, configfile, verbose, trace, trace_file, profile):
     """A glorious command line tool to make your life with git, GitHub
     and Bugzilla much easier."""
+    from . import state
+
+    if trace or trace_file or profile:
+        from . import trace as tracing
+
+        tracing.start(summary=trace, trace_file=trace_file, profile_file=profile)
+        click.get_current_context().call_on_close(tracing.stop)
+
     config.verbose = verbose
     config.configfile = configfile
-    if not os.path.isfile(configfile):
-        state.write(configfile, {})
-
-
-# load in the builtin apps
-from .builtins import bugzilla  # noqa
-from .builtins import github  # noqa
-from .builtins import config as _  # noqa
-from .builtins import local_config as _  # noqa
-from .builtins.commit import gg_commit  # noqa
-from .builtins.pr import gg_pr  # noqa
-from .builtins.merge import gg_merge  # noqa
-from .builtins.mastermerge import gg_mastermerge  # noqa
-from .builtins.start import gg_start  # noqa
-from .builtins.push import gg_push  # noqa
-from .builtins.getback import gg_getback  # noqa
-from .builtins.rebase import gg_rebase  # noqa
-from .builtins.branches import gg_branches  # noqa
-from .builtins.cleanup import gg_cleanup  # noqa
-
-# Simply loading all installed packages that have this entry_point
-# will be enough. Each plugin automatically registers itself with the
-# cli click group.
-for entry_point in iter_entry_points(group="gg.plugin", name=None):
-    entry_point.load()
+    state.create(configfile)
@@ -0,0 +1,88 @@
+import hashlib
+import importlib
+import os
+import sys
+
+from . import cache
+
+ENTRY_POINT_GROUP = "gg.plugin"
+INDEX_NAME = "plugins.json"
+
+
+def get_index_key():
+    """Return a string that changes whenever a distribution is installed or
+    uninstalled, because that changes the mtime of the directory (e.g.
+    site-packages) it gets installed into."""
+    parts = [sys.executable]
+    for path in sys.path:
+        if not path:
+            # That's the current working directory. Not where plugins live.
+            continue
+        try:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            continue
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def iter_entry_points():
+    # Only needed when the index is stale, so don't pay for importing it
+    # on every run.
+    try:
+        from importlib import metadata as importlib_metadata
+    except ImportError:  # Python < 3.8
+        import importlib_metadata
+
+    entry_points = importlib_metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        entry_points = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        entry_points = entry_points.get(ENTRY_POINT_GROUP, [])
+    seen = set()
+    for entry_point in entry_points:
+        # The same distribution can be on sys.path more than once.
+        if (entry_point.name, entry_point.value) not in seen:
+            seen.add((entry_point.name, entry_point.value))
+            yield entry_point
+
+
+def import_object(value):
+    """Import something like 'gg_myplugin:start' the way an entry point
+    would be loaded."""
+    module_name, _, attributes = value.partition(":")
+    obj = importlib.import_module(module_name)
+    for attribute in filter(None, attributes.split(".")):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def get_plugins(group):
+    """Return a list of all installed plugins, like
+    `{"name": ..., "value": ..., "commands": {name: help, ...}}`, where
+    `commands` are the commands each plugin adds to the click `group`.
+
+    This is read from an on-disk index if nothing has been installed since
+    the index was written. Otherwise every plugin is loaded (which
+    registers its commands with `group`) to build a new index.
+    """
+    key = get_index_key()
+    index = cache.read(INDEX_NAME)
+    if index and index.get("key") == key:
+        return index["plugins"]
+
+    plugins = []
+    for entry_point in iter_entry_points():
+        # Loading a plugin that adds a command to a builtin group (e.g.
+        # `@github.command()`) imports that builtin, which isn't the
+        # plugin's command.
+        before = set(group.commands) | set(getattr(group, "lazy_commands", {}))
+        entry_point.load()
+        commands = {}
+        for name in sorted(set(group.commands) - before):
+            command = group.commands[name]
+            commands[name] = command.short_help or command.help or ""
+        plugins.append(
+            {"name": entry_point.name, "value": entry_point.value, "commands": commands}
+        )
+    cache.write(INDEX_NAME, {"key": key, "plugins": plugins})
+    return plugins
@@ -0,0 +1,231 @@
+import datetime
+import hashlib
+import os
+import subprocess
+
+from . import cache
+from .trace import traced
+
+# NUL separated because the subject can contain anything else
+REF_FORMAT = (
+    "%(refname)%00%(committerdate:raw)%00%(upstream:short)%00%(contents:subject)"
+)
+# Which branches were squash merged or rebased, per repo, for the commit
+# the default branch was at.
+SQUASHED_CACHE_NAME = "squashed-branches.json"
+# Where the name of every branch is written down, per repo
+BRANCH_INDEX_NAME = "branches-{}.json"
+
+
+def parse_raw_date(raw):
+    """Return a timezone aware datetime from something like
+    '1600000000 +0100' (%(committerdate:raw))."""
+    timestamp, offset = raw.split()
+    delta = datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+    if offset.startswith("-"):
+        delta = -delta
+    return datetime.datetime.fromtimestamp(int(timestamp), datetime.timezone(delta))
+
+
+def for_each_ref(repo, *patterns):
+    """Yield a dict for every ref matching `patterns` (e.g. 'refs/heads'),
+    most recently committed first, with its 'refname' (e.g.
+    'refs/heads/main'), commit 'date', 'upstream' (e.g. 'origin/main', or
+    '') and the commit message 'subject'. All from one git command."""
+    output = repo.git.for_each_ref(
+        "--sort=-committerdate", f"--format={REF_FORMAT}", *patterns
+    )
+    for line in output.splitlines():
+        refname, date, upstream, subject = line.split("\0", 3)
+        if not date:
+            continue  # e.g. an annotated tag
+        yield {
+            "refname": refname,
+            "date": parse_raw_date(date),
+            "upstream": upstream,
+            "subject": subject,
+        }
+
+
+def get_merged_branches(repo, target="HEAD"):
+    """Return a set of the names of the local branches that have been merged
+    into `target` (e.g. 'origin/main')."""
+    output = repo.git.for_each_ref(
+        f"--merged={target}", "--format=%(refname:lstrip=2)", "refs/heads"
+    )
+    return set(output.splitlines())
+
+
+def fast_forward(repo, remote_name, branch):
+    """Update the local `branch` to what it is on the remote, like checking
+    it out and pulling would, but without touching the working tree. Only
+    if that's a fast-forward, and it's not checked out. Return whether it
+    worked. The remote-tracking branch is updated either way."""
+    # Not imported at the top, so that shell completion (see gg.completion)
+    # can use this module without importing GitPython.
+    import git
+
+    try:
+        repo.git.fetch(remote_name, f"{branch}:{branch}")
+    except git.GitCommandError:
+        # e.g. the local branch has commits the remote doesn't have
+        repo.git.fetch(remote_name, branch)
+        return False
+    return True
+
+
+@traced()
+def get_squashed_branches(repo, target, names):
+    """Return a set of those branch `names` whose changes are all in `target`
+    even though they weren't merged. E.g. because they were squash merged or
+    rebased (as GitHub can do) before being merged.
+
+    This compares patch ids, which is slow, so the answers are cached for
+    as long as neither the branch nor `target` has moved."""
+    target_sha = repo.git.rev_parse(target)
+    output = repo.git.for_each_ref(
+        "--format=%(refname:lstrip=2) %(objectname)", "refs/heads"
+    )
+    shas = dict(line.split() for line in output.splitlines())
+
+    cached = cache.read(SQUASHED_CACHE_NAME, {})
+    previous = cached.get(repo.git_dir, {})
+    if previous.get("target") != target_sha:
+        previous = {"target": target_sha, "branches": {}}
+    squashed = set()
+    changed = False
+    for name in names:
+        sha = shas.get(name)
+        if not sha:
+            continue
+        if previous["branches"].get(name, [None])[0] != sha:
+            previous["branches"][name] = [sha, is_squashed(repo, target_sha, sha)]
+            changed = True
+        if previous["branches"][name][1]:
+            squashed.add(name)
+    if changed:
+        cached[repo.git_dir] = previous
+        cache.write(SQUASHED_CACHE_NAME, cached)
+    return squashed
+
+
+def is_squashed(repo, target, sha):
+    # Rebased or cherry-picked? Then every commit has its equivalent in target.
+    cherry = repo.git.cherry(target, sha).splitlines()
+    if cherry and all(line.startswith("-") for line in cherry):
+        return True
+    # Squash merged? Then all of the branch, as one diff, is one commit there.
+    base = repo.git.merge_base(target, sha)
+    branch_patch_ids = get_patch_ids(repo, "diff", "--no-color", base, sha)
+    if not branch_patch_ids:
+        return False  # nothing in it
+    target_patch_ids = get_patch_ids(
+        repo, "log", "-p", "--no-color", "--no-merges", f"{base}..{target}"
+    )
+    return bool(branch_patch_ids & target_patch_ids)
+
+
+def get_patch_ids(repo, *args):
+    """Return the set of `git patch-id`s of the diffs `git <args>` prints.
+    Make sure those are printed with --no-color."""
+    diff = subprocess.run(
+        ["git", *args], cwd=repo.working_dir, capture_output=True, check=True
+    ).stdout
+    output = subprocess.run(
+        ["git", "patch-id", "--stable"],
+        input=diff,
+        cwd=repo.working_dir,
+        capture_output=True,
+        check=True,
+    ).stdout
+    return {line.split()[0] for line in output.decode("utf-8").splitlines()}
+
+
+def get_refs_key(repo):
+    """Return a string that changes whenever a ref is added, removed or
+    updated, because git does that by renaming a file into the refs
+    directory (which changes its mtime) or by rewriting packed-refs."""
+    paths = [os.path.join(repo.common_dir, "packed-refs")]
+    for name in ("refs/heads", "refs/remotes"):
+        for root, directories, _ in os.walk(os.path.join(repo.common_dir, name)):
+            paths.append(root)
+    parts = []
+    for path in paths:
+        try:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            continue
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+@traced()
+def get_branch_index(repo):
+    """Return a list of `[refname, lowercase name, timestamp]` of all local
+    and remote branches, most recently committed first. It's kept in the
+    cache until any ref changes."""
+    key = get_refs_key(repo)
+    name = BRANCH_INDEX_NAME.format(
+        hashlib.sha1(repo.common_dir.encode("utf-8")).hexdigest()[:16]
+    )
+    index = cache.read(name)
+    if index and index["key"] == key:
+        return index["branches"]
+
+    branches = []
+    for ref in for_each_ref(repo, "refs/heads", "refs/remotes"):
+        if ref["refname"].endswith("/HEAD"):
+            continue  # e.g. refs/remotes/origin/HEAD
+        short_name = ref["refname"].split("/", 2)[2]
+        branches.append(
+            [ref["refname"], short_name.lower(), int(ref["date"].timestamp())]
+        )
+    cache.write(name, {"key": key, "branches": branches})
+    return branches
+
+
+def search(names, searchstring, exact=False, fuzzy=False):
+    """Return the indexes of the lowercase `names` that match `searchstring`,
+    best first. That's all of them, if there's no `searchstring`, or those
+    that start with it, and then those that contain it. If none do, and
+    `fuzzy`, those that have all of its letters in the same order, e.g.
+    'fxbg' for 'fix-bug', best match first. In the order of `names` when
+    it's a tie."""
+    needle = searchstring.lower()
+    if not needle:
+        return list(range(len(names)))
+    if exact:
+        return [i for i, name in enumerate(names) if name == needle]
+    prefix = []
+    substring = []
+    for i, name in enumerate(names):
+        if name.startswith(needle):
+            prefix.append(i)
+        elif needle in name:
+            substring.append(i)
+    if prefix or substring or not fuzzy:
+        return prefix + substring
+    scored = []
+    for i, name in enumerate(names):
+        score = get_fuzzy_score(name, needle)
+        if score:
+            scored.append((-score, i))
+    return [i for _, i in sorted(scored)]
+
+
+def get_fuzzy_score(name, needle):
+    """Return how well the letters of `needle` are found, in order, in
+    `name`. More for letters that are next to each other or start a word.
+    0 if they're not all there."""
+    score = 0
+    position = -1
+    for letter in needle:
+        found = name.find(letter, position + 1)
+        if found == -1:
+            return 0
+        score += 1
+        if found == position + 1:
+            score += 2
+        if found == 0 or not name[found - 1].isalnum():
+            score += 2
+        position = found
+    return score
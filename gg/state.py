@@ -1,17 +1,328 @@
+import contextlib
 import datetime
 import json
+import os
+import sqlite3
+import tempfile
+from collections.abc import MutableMapping
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import click
+
+from .trace import traced
 from .utils import get_repo_name
 
+# Config files with any of these extensions are SQLite databases
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+# JSON config files that have already been parsed, by absolute path, along
+# with the (inode, mtime, size) they had. See preload().
+_preloaded = {}
+
+
+@contextlib.contextmanager
+def locked(configfile):
+    """Hold an exclusive advisory lock for writing to the config file, for
+    when more than one gg runs at the same time."""
+    if fcntl is None:  # e.g. Windows
+        yield
+        return
+    with open(configfile + ".lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class JSONBackend:
+    """All the state as one JSON object in one file. This is the default."""
+
+    def __init__(self, configfile):
+        self.configfile = configfile
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    @traced("state")
+    def _read(self):
+        with open(self.configfile) as f:
+            preloaded = _preloaded.pop(os.path.abspath(self.configfile), None)
+            if preloaded and preloaded[0] == get_file_key(f):
+                return preloaded[1]
+            return json.load(f)
+
+    def create(self):
+        with locked(self.configfile):
+            if not os.path.isfile(self.configfile):
+                self._write({})
+
+    def get(self, key):
+        return self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+    def save(self, changed, removed):
+        with locked(self.configfile):
+            # Someone else might have changed other things in the file since
+            # we read it. Apply only our changes to what's there now.
+            data = self._read()
+            data.update(changed)
+            for key in removed:
+                data.pop(key, None)
+            self._write(data)
+
+    def replace(self, data):
+        with locked(self.configfile):
+            self._write(data)
+
+    @traced("state")
+    def _write(self, data):
+        # Write to a temporary file and rename that, so nobody ever gets to
+        # read a half-written config file, even if we crash.
+        directory = os.path.dirname(os.path.abspath(self.configfile))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".gg.", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.configfile)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._data = data
+
+
+def get_file_key(f):
+    stat = os.fstat(f.fileno())
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def preload(configfile):
+    """Parse the JSON config file now, so that the next time it's read, in
+    this process, it doesn't have to be, unless it has changed since. The
+    daemon (see gg.daemon) does this before it forks to run a command."""
+    if configfile.endswith(SQLITE_EXTENSIONS):
+        return
+    path = os.path.abspath(configfile)
+    try:
+        with open(path) as f:
+            key = get_file_key(f)
+            if path not in _preloaded or _preloaded[path][0] != key:
+                _preloaded[path] = (key, json.load(f))
+    except (OSError, ValueError):
+        _preloaded.pop(path, None)
+
+
+class SQLiteBackend:
+    """The state in a SQLite database, for when the JSON file has become
+    too big to parse and rewrite on every command. Branches and per-repo
+    config are stored by repo name, so looking one up is an indexed query,
+    and only what changed gets written.
+
+    When the database is first created, everything in the JSON config file
+    next to it (e.g. ~/.gg.json for ~/.gg.sqlite3) is copied into it.
+    """
+
+    TABLES = {
+        "global": ("key",),
+        "branches": ("repo", "branch"),
+        "repo_config": ("repo", "key"),
+    }
+
+    def __init__(self, configfile):
+        self.configfile = configfile
+        self._cache = {}
+        new = not os.path.isfile(configfile)
+        # SQLite does its own locking. Just wait a bit longer for it.
+        self.connection = sqlite3.connect(configfile, timeout=30)
+        with self.connection:
+            for table, columns in self.TABLES.items():
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"({', '.join(f'{c} TEXT' for c in columns)}, "
+                    f"value TEXT NOT NULL, PRIMARY KEY ({', '.join(columns)})) "
+                    "WITHOUT ROWID"
+                )
+        if new:
+            json_configfile = os.path.splitext(configfile)[0] + ".json"
+            if os.path.isfile(json_configfile):
+                with open(json_configfile) as f:
+                    self.save(json.load(f), ())
+
+    @staticmethod
+    def _split(key):
+        """Return the table and its primary key values for a key like
+        'FORK_NAME', '$repo:$branch' or '$repo:_config:$key'."""
+        if ":_config:" in key:
+            return "repo_config", tuple(key.split(":_config:", 1))
+        if ":" in key:
+            # Branch names can't contain a ':' but repo names could.
+            return "branches", tuple(key.rsplit(":", 1))
+        return "global", (key,)
+
+    def _where(self, table):
+        return " AND ".join(f"{column} = ?" for column in self.TABLES[table])
+
+    def create(self):
+        pass  # Connecting to it created it
+
+    @traced("state")
+    def get(self, key):
+        if key not in self._cache:
+            table, values = self._split(key)
+            row = self.connection.execute(
+                f"SELECT value FROM {table} WHERE {self._where(table)}", values
+            ).fetchone()
+            self._cache[key] = json.loads(row[0]) if row else KeyError
+        if self._cache[key] is KeyError:
+            raise KeyError(key)
+        return self._cache[key]
+
+    @traced("state")
+    def keys(self):
+        rows = self.connection.execute(
+            "SELECT key FROM global "
+            "UNION ALL SELECT repo || ':' || branch FROM branches "
+            "UNION ALL SELECT repo || ':_config:' || key FROM repo_config"
+        )
+        return [row[0] for row in rows]
+
+    @traced("state")
+    def save(self, changed, removed):
+        with self.connection:
+            for key, value in changed.items():
+                table, values = self._split(key)
+                columns = self.TABLES[table] + ("value",)
+                self.connection.execute(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    values + (json.dumps(value),),
+                )
+                self._cache[key] = value
+            for key in removed:
+                table, values = self._split(key)
+                self.connection.execute(
+                    f"DELETE FROM {table} WHERE {self._where(table)}", values
+                )
+                self._cache[key] = KeyError
+
+    @traced("state")
+    def replace(self, data):
+        with self.connection:
+            for table in self.TABLES:
+                self.connection.execute(f"DELETE FROM {table}")
+        self._cache.clear()
+        self.save(data, ())
+
+
+def get_backend(configfile):
+    if configfile.endswith(SQLITE_EXTENSIONS):
+        return SQLiteBackend(configfile)
+    return JSONBackend(configfile)
+
+
+class Session(MutableMapping):
+    """The state in a config file, read only when needed and then kept in
+    memory. Changes are only written back to the file by `flush()`.
+
+    While a command is running, all the functions in this module share one
+    session per config file (see `get_session()`), which gets flushed when
+    the command finishes.
+    """
+
+    def __init__(self, configfile):
+        self.configfile = configfile
+        self.backend = get_backend(configfile)
+        self.changed = {}
+        self.removed = set()
+
+    def __getitem__(self, key):
+        if key in self.changed:
+            return self.changed[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.backend.get(key)
+
+    def __setitem__(self, key, value):
+        self.changed[key] = value
+        self.removed.discard(key)
+
+    def __delitem__(self, key):
+        self[key]  # raises KeyError if it's not there
+        self.changed.pop(key, None)
+        self.removed.add(key)
+
+    def __iter__(self):
+        keys = set(self.backend.keys()) | set(self.changed)
+        return iter(sorted(keys - self.removed))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def flush(self):
+        if self.changed or self.removed:
+            self.backend.save(self.changed, self.removed)
+            self.changed = {}
+            self.removed = set()
+
+
+def get_session(configfile):
+    """Return the session of the running command for this config file.
+    Returns None if there is no command running (e.g. when used from a
+    plugin's own code or from tests)."""
+    ctx = click.get_current_context(silent=True)
+    sessions = ctx and getattr(ctx.obj, "state_sessions", None)
+    if sessions is None:
+        return None
+    if configfile not in sessions:
+        session = sessions[configfile] = Session(configfile)
+
+        def close():
+            sessions.pop(configfile, None)
+            session.flush()
+
+        ctx.find_root().call_on_close(close)
+    return sessions[configfile]
+
+
+@contextlib.contextmanager
+def _session(configfile):
+    session = get_session(configfile)
+    if session is not None:
+        yield session
+    else:
+        session = Session(configfile)
+        yield session
+        session.flush()
+
 
 def read(configfile):
-    with open(configfile, "r") as f:
-        return json.load(f)
+    session = get_session(configfile)
+    if session is None:
+        session = Session(configfile)
+    return session
 
 
 def write(configfile, data):
-    with open(configfile, "w") as f:
-        json.dump(data, f, indent=2, sort_keys=True)
+    """Replace everything in the config file with `data`, which can be what
+    read() returned."""
+    get_backend(configfile).replace(dict(data))
+
+
+def create(configfile):
+    """Create the config file, unless it already exists."""
+    get_backend(configfile).create()
 
 
 def save(configfile, description, branch_name, **extra):
@@ -37,19 +348,16 @@ def load_config(configfile, key):
 
 
 def update(configfile, data):
-    state = read(configfile)
-    state.update(data)
-    write(configfile, state)
+    with _session(configfile) as state:
+        state.update(data)
 
 
 def update_config(configfile, **kwargs):
-    state = read(configfile)
-    for key, value in kwargs.items():
-        state[f"{get_repo_name()}:_config:{key}"] = value
-    write(configfile, state)
+    with _session(configfile) as state:
+        for key, value in kwargs.items():
+            state[f"{get_repo_name()}:_config:{key}"] = value
 
 
 def remove(configfile, key):
-    state = read(configfile)
-    del state[key]
-    write(configfile, state)
+    with _session(configfile) as state:
+        del state[key]
@@ -0,0 +1,156 @@
+import os
+import shutil
+import time
+
+from .trace import traced
+
+# Don't spend more than this many seconds looking for the youngest file in
+# untracked directories (e.g. a node_modules/ nobody told git to ignore).
+UNTRACKED_SCAN_BUDGET = 1.0
+# The first git with its own file system monitor daemon
+BUILTIN_FSMONITOR_VERSION = (2, 36)
+
+
+class Status:
+    """A snapshot of the working tree from one `git status` call.
+
+    Paths are relative to the root of the repo. Like `git status`, a
+    directory that has nothing but untracked (and not ignored) files in it
+    is one untracked path, ending in a '/', and isn't looked in. Pass
+    `untracked_files="no"` if you don't care about untracked files at all,
+    which is faster. So is `renames=False`, if a staged rename may as well be
+    a deleted and an added file.
+
+    If `core.fsmonitor` is enabled (see `enable_speedups()`), git only looks
+    at the files that have changed, instead of checking every file in the
+    working tree.
+    """
+
+    def __init__(self, repo, untracked_files="normal", renames=True):
+        self.staged = []  # changed in the index, compared to HEAD
+        self.modified = []  # changed in the working tree, compared to the index
+        self.deleted = []  # deleted from the working tree
+        self.unmerged = []
+        self.untracked = []
+        args = ["--porcelain=v2", "-z", f"--untracked-files={untracked_files}"]
+        if not renames:
+            args.append("--no-renames")
+        output = repo.git.status(*args)
+        entries = iter(output.split("\0"))
+        for entry in entries:
+            if entry.startswith("? "):
+                self.untracked.append(entry[2:])
+            elif entry.startswith("u "):
+                self.unmerged.append(entry.split(" ", 10)[-1])
+            elif entry.startswith(("1 ", "2 ")):
+                # e.g. '1 .M N... 100644 100644 100644 $sha $sha some/path'
+                fields = entry.split(" ", 8 if entry[0] == "1" else 9)
+                staged, changed = fields[1]
+                if entry[0] == "2":
+                    next(entries)  # the path it was renamed or copied from
+                if staged != ".":
+                    self.staged.append(fields[-1])
+                if changed == "D":
+                    self.deleted.append(fields[-1])
+                elif changed != ".":
+                    self.modified.append(fields[-1])
+
+    @property
+    def dirty(self):
+        """Like `repo.is_dirty()`, untracked files don't count."""
+        return bool(self.staged or self.modified or self.deleted or self.unmerged)
+
+    @property
+    def changed(self):
+        """All the paths that make it dirty."""
+        paths = self.staged + self.modified + self.deleted + self.unmerged
+        return list(dict.fromkeys(paths))
+
+
+def get_speedups(repo):
+    """Return a dict of what `core.fsmonitor` and `core.untrackedCache` are
+    set to, if anything. Git uses them by itself when they are."""
+    status, output, _ = repo.git.config(
+        "--get-regexp",
+        r"^core\.(fsmonitor|untrackedcache)$",
+        with_extended_output=True,
+        with_exceptions=False,
+    )
+    speedups = {"core.fsmonitor": None, "core.untrackedCache": None}
+    for line in output.splitlines():
+        key, _, value = line.partition(" ")
+        if key == "core.fsmonitor":
+            speedups["core.fsmonitor"] = value
+        else:
+            speedups["core.untrackedCache"] = value
+    return speedups
+
+
+def enable_speedups(repo):
+    """Turn on the untracked cache, and a file system monitor if there's one
+    we can use: git's own daemon (macOS and Windows) or Watchman. Return
+    what's now configured, like `get_speedups()`."""
+    repo.git.config("core.untrackedCache", "true")
+    builtin = False
+    # Older versions don't have it, and exit with 1 too, and to them
+    # core.fsmonitor=true means a hook called 'true'.
+    if repo.git.version_info[:2] >= BUILTIN_FSMONITOR_VERSION:
+        status, _, _ = repo.git.execute(
+            ["git", "fsmonitor--daemon", "status"],
+            with_extended_output=True,
+            with_exceptions=False,
+        )
+        builtin = status in (0, 1)  # running or not, it's supported
+    if builtin:
+        repo.git.config("core.fsmonitor", "true")
+    elif shutil.which("watchman"):
+        hooks = os.path.join(repo.git_dir, "hooks")
+        hook = os.path.join(hooks, "fsmonitor-watchman")
+        if not os.path.exists(hook):
+            # Git installs this sample hook in every new repo
+            sample = os.path.join(hooks, "fsmonitor-watchman.sample")
+            if os.path.isfile(sample):
+                shutil.copy(sample, hook)
+                os.chmod(hook, 0o755)
+        if os.path.exists(hook):
+            repo.git.config("core.fsmonitor", hook)
+    return get_speedups(repo)
+
+
+@traced()
+def get_ages(root, paths, budget=UNTRACKED_SCAN_BUDGET):
+    """Return a dict of how many seconds ago each path (relative to `root`)
+    was modified. For directories, it's the youngest file in it, as far as
+    can be found within the `budget` seconds shared by all of them. After
+    that it's just the directory's own mtime."""
+    now = time.time()
+    deadline = time.monotonic() + budget
+    ages = {}
+    for path in paths:
+        full_path = os.path.join(root, path)
+        try:
+            mtime = os.stat(full_path).st_mtime
+        except OSError:
+            continue  # gone already
+        if path.endswith("/"):
+            mtime = max(mtime, get_youngest_mtime(full_path, deadline))
+        ages[path] = now - mtime
+    return ages
+
+
+def get_youngest_mtime(directory, deadline):
+    youngest = 0
+    directories = [directory]
+    while directories and time.monotonic() < deadline:
+        try:
+            with os.scandir(directories.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    else:
+                        youngest = max(
+                            youngest, entry.stat(follow_symlinks=False).st_mtime
+                        )
+        except OSError:
+            continue
+    return youngest
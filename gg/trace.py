@@ -0,0 +1,182 @@
+"""Find out where a command spends its time. With `gg --trace` (or
+$GG_TRACE) every git command, subprocess, HTTP request and read or write of
+the config file is timed, as are the slower steps of the commands, and a
+summary is printed when the command is done. `--trace-file` writes the
+same as a Chrome trace (open it in chrome://tracing or
+https://ui.perfetto.dev) and `--profile` writes cProfile stats.
+
+Use `span()` or `traced()` to time something more.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import subprocess
+import threading
+import time
+from urllib.parse import urlparse
+
+import click
+
+# While tracing, a list of (name, category, start, duration, thread id,
+# details) for everything timed, and what to do with it when done.
+_spans = None
+_started = None
+_options = {}
+_patched = []
+
+
+@contextlib.contextmanager
+def span(name, category="gg", details=None):
+    """Time what's done in the block, if tracing."""
+    if _spans is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        took = time.perf_counter() - t0
+        _spans.append((name, category, t0, took, threading.get_ident(), details))
+
+
+def traced(category="gg", name=None):
+    """Decorator to time every call of the function, if tracing."""
+
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _spans is None:
+                return function(*args, **kwargs)
+            with span(span_name, category):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def patch(owner, attribute, category, describe):
+    """Time every call of a function we don't own. `describe` gets the same
+    arguments and returns the name and details of the span."""
+    original = getattr(owner, attribute)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        name, details = describe(*args, **kwargs)
+        with span(name, category, details):
+            return original(*args, **kwargs)
+
+    setattr(owner, attribute, wrapper)
+    _patched.append((owner, attribute, original))
+
+
+def describe_command(command):
+    if isinstance(command, str):
+        command = command.split()
+    command = [str(word) for word in command]
+    words = [os.path.basename(command[0])]
+    # The subcommand, e.g. 'git status'
+    words.extend([word for word in command[1:] if not word.startswith("-")][:1])
+    return " ".join(words), " ".join(command)
+
+
+def start(summary=True, trace_file=None, profile_file=None):
+    global _spans, _started
+    # Imported here so that importing this module, to use span() or
+    # traced(), doesn't import them.
+    import git
+    import requests
+
+    _spans = []
+    _started = time.perf_counter()
+    _options.update(summary=summary, trace_file=trace_file, profile=None)
+    patch(
+        git.cmd.Git,
+        "execute",
+        "git",
+        lambda self, command, *args, **kwargs: describe_command(command),
+    )
+    patch(
+        subprocess,
+        "run",
+        "subprocess",
+        lambda command, *args, **kwargs: describe_command(command),
+    )
+    patch(
+        requests.Session,
+        "request",
+        "http",
+        lambda self, method, url, *args, **kwargs: (
+            f"{method.upper()} {urlparse(url)._replace(query='').geturl()}",
+            url,
+        ),
+    )
+    if profile_file:
+        import cProfile
+
+        _options["profile"] = (cProfile.Profile(), profile_file)
+        _options["profile"][0].enable()
+
+
+def stop():
+    """Stop tracing and report what was found."""
+    global _spans
+    if _spans is None:
+        return
+    took = time.perf_counter() - _started
+    spans, _spans = _spans, None
+    while _patched:
+        owner, attribute, original = _patched.pop()
+        setattr(owner, attribute, original)
+    if _options["profile"]:
+        profile, profile_file = _options["profile"]
+        profile.disable()
+        profile.dump_stats(profile_file)
+    if _options["trace_file"]:
+        with open(_options["trace_file"], "w") as f:
+            json.dump(get_trace_events(spans, _started), f)
+    if _options["summary"]:
+        click.echo(format_summary(spans, took), err=True)
+
+
+def get_trace_events(spans, started):
+    """Return the spans in the Chrome trace event format."""
+    pid = os.getpid()
+    events = []
+    for name, category, t0, took, thread_id, details in spans:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((t0 - started) * 1_000_000),
+            "dur": round(took * 1_000_000),
+            "pid": pid,
+            "tid": thread_id,
+        }
+        if details:
+            event["args"] = {"details": details}
+        events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def format_summary(spans, took):
+    """Return a table of how many times each thing was done and how long it
+    took, in total and at most, longest total first. Spans inside other
+    spans count in both."""
+    totals = {}
+    for name, category, _, duration, _, _ in spans:
+        count, total, longest = totals.get((category, name), (0, 0.0, 0.0))
+        totals[(category, name)] = (count + 1, total + duration, max(longest, duration))
+    lines = [f"{'CALLS':>6} {'TOTAL':>10} {'MAX':>10}  {'WHAT':<10} NAME"]
+    ordered = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+    for (category, name), (count, total, longest) in ordered:
+        lines.append(
+            f"{count:>6} {total * 1000:>8.1f}ms {longest * 1000:>8.1f}ms  "
+            f"{category:<10} {name}"
+        )
+    lines.append(f"{took * 1000:.1f}ms in total")
+    return "\n".join(lines)
@@ -1,22 +1,40 @@
 import os
 import subprocess
+import time
 from urllib.parse import urlparse
 
 import click
 import git
 
+from . import cache
+from .trace import traced
+
+# How long to trust what the remote said its default branch is
+DEFAULT_BRANCH_CACHE_TTL = 60 * 60 * 24
+DEFAULT_BRANCH_CACHE_NAME = "default-branch.json"
+
 
 def get_repo(here="."):
-    if os.path.abspath(here) == "/":  # hit rock bottom
-        raise git.InvalidGitRepositoryError("Unable to find repo root")
-    if os.path.isdir(os.path.join(here, ".git")):
-        return git.Repo(here)
-    return get_repo(os.path.join(here, ".."))
+    """Return the git.Repo that `here` is in, looking in the parent
+    directories too. Like git itself, this respects $GIT_DIR and the
+    `.git` files that worktrees and submodules have."""
+    if here == "." and os.environ.get("GIT_DIR"):
+        return git.Repo()
+    return git.Repo(here, search_parent_directories=True)
+
+
+def get_current_repo():
+    """Return the repo of the command that is running. The command's Config
+    has already opened it, so don't open (and find) it all over again."""
+    ctx = click.get_current_context(silent=True)
+    repo = ctx and getattr(ctx.obj, "repo", None)
+    if repo is None:
+        repo = get_repo()
+    return repo
 
 
 def get_repo_name():
-    repo = get_repo()
-    return os.path.basename(repo.working_dir)
+    return os.path.basename(get_current_repo().working_dir)
 
 
 def error_out(msg, raise_abort=True):
@@ -49,8 +67,52 @@ def is_bugzilla(data):
     return False
 
 
-def get_default_branch(repo, origin_name):
-    # TODO: Figure out how to do this with GitPython
+@traced()
+def get_default_branch(repo, origin_name, configured=None, refresh=False):
+    """Return the name of the default branch (e.g. 'main') of the remote.
+
+    Asking the remote is a network round-trip, so that's only done when it
+    can't be figured out from the `configured` DEFAULT_BRANCH (which wins,
+    because someone said so), `refs/remotes/$origin_name/HEAD`, or a
+    recently cached answer. Or if `refresh` is true.
+    """
+    key = f"{repo.git_dir}:{origin_name}"
+    if not refresh:
+        branch = configured or get_local_default_branch(repo, origin_name)
+        if branch:
+            return branch
+        cached = cache.read(DEFAULT_BRANCH_CACHE_NAME, {}).get(key)
+        if cached and time.time() - cached["time"] < DEFAULT_BRANCH_CACHE_TTL:
+            return cached["branch"]
+
+    branch = get_remote_default_branch(repo, origin_name)
+    now = time.time()
+    cached = {
+        k: v
+        for k, v in cache.read(DEFAULT_BRANCH_CACHE_NAME, {}).items()
+        if now - v["time"] < DEFAULT_BRANCH_CACHE_TTL
+    }
+    cached[key] = {"branch": branch, "time": now}
+    cache.write(DEFAULT_BRANCH_CACHE_NAME, cached)
+
+    if refresh and get_local_default_branch(repo, origin_name) not in (None, branch):
+        # Otherwise the local ref would keep winning over what we just learned.
+        repo.git.remote("set-head", origin_name, branch)
+    return branch
+
+
+def get_local_default_branch(repo, origin_name):
+    """Return the branch `refs/remotes/$origin_name/HEAD` points to, or None.
+    That's set by `git clone` (and `git remote set-head`)."""
+    ref = git.SymbolicReference(repo, f"refs/remotes/{origin_name}/HEAD")
+    try:
+        return ref.reference.remote_head
+    except (ValueError, TypeError):
+        # Doesn't exist, or isn't a symbolic ref.
+        return None
+
+
+def get_remote_default_branch(repo, origin_name):
     res = subprocess.run(
         f"git remote show {origin_name}".split(),
         check=True,
@@ -34,11 +34,18 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     zip_safe=False,
-    install_requires=["click", "colorama", "requests", "GitPython"],
+    install_requires=[
+        "click",
+        "colorama",
+        "requests",
+        "GitPython",
+        'importlib_metadata; python_version < "3.8"',
+    ],
     extras_require={"dev": dev_requirements},
     entry_points="""
         [console_scripts]
         gg=gg.main:cli
+        ggd=gg.daemon:client
     """,
     setup_requires=["pytest-runner"],
     tests_require=["pytest", "pytest-mock", "requests_mock"],
@@ -156,3 +156,68 @@ def test_get_summary_with_token(temp_configfile, requestsmock):
     summary, url = bugzilla.get_summary(config, "123456789")
     assert summary == "This is a SECRET!"
     assert url == "https://privatebugs.example.com/show_bug.cgi?id=123456789"
+
+
+def test_get_summaries_batched_and_cached(temp_configfile, requestsmock):
+    requestsmock.get(
+        "https://bugs.example.com/rest/bug/?ids=1,2&include_fields=summary,id",
+        json={"bugs": [{"id": 1, "summary": "First"}, {"id": 2, "summary": "Second"}]},
+    )
+    config = Config()
+    config.configfile = temp_configfile
+    config.bugzilla_url = "https://bugs.example.com"
+
+    summaries = bugzilla.get_summaries(config, [1, "2", 1])
+    assert summaries == {
+        1: ("First", "https://bugs.example.com/show_bug.cgi?id=1"),
+        2: ("Second", "https://bugs.example.com/show_bug.cgi?id=2"),
+    }
+    assert requestsmock.call_count == 1
+
+    # The second time, they come from the cache
+    assert bugzilla.get_summaries(config, [2, 1]) == summaries
+    assert bugzilla.get_summary(config, "2")[0] == "Second"
+    assert requestsmock.call_count == 1
+
+
+def test_get_summaries_one_missing(temp_configfile, requestsmock):
+    url = "https://bugs.example.com/rest/bug/"
+    requestsmock.get(f"{url}?ids=1,2", status_code=404, json={"error": True})
+    requestsmock.get(f"{url}?ids=1", json={"bugs": [{"id": 1, "summary": "First"}]})
+    requestsmock.get(f"{url}?ids=2", status_code=404, json={"error": True})
+    config = Config()
+    config.configfile = temp_configfile
+    config.bugzilla_url = "https://bugs.example.com"
+
+    summaries = bugzilla.get_summaries(config, [1, 2])
+    assert list(summaries) == [1]
+
+
+def test_prefetch(temp_configfile, requestsmock):
+    with open(temp_configfile, "w") as f:
+        saved = {
+            "gg:1-first": {
+                "description": "First",
+                "bugnumber": 1,
+                "url": "https://bugzilla.mozilla.org/show_bug.cgi?id=1",
+            },
+            "gg:7-github": {
+                "description": "GitHub",
+                "bugnumber": 7,
+                "url": "https://github.com/peterbe/gg/issues/7",
+            },
+            "gg:no-bug": {"description": "No bug", "bugnumber": None},
+        }
+        json.dump(saved, f)
+    requestsmock.get(
+        "https://bugzilla.mozilla.org/rest/bug/?ids=1",
+        json={"bugs": [{"id": 1, "summary": "First"}]},
+    )
+
+    runner = CliRunner()
+    config = Config()
+    config.configfile = temp_configfile
+    result = runner.invoke(bugzilla.prefetch, [], obj=config)
+    assert result.exit_code == 0
+    assert "1 of 1 bug summaries cached" in result.output
+    assert requestsmock.call_count == 1
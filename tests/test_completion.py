@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import git
+
+import gg
+from gg import completion
+from gg.main import cli
+
+
+def test_get_completions(tmp_path, monkeypatch):
+    repo = git.Repo.init(tmp_path)
+    repo.index.commit("first")
+    repo.create_head("fix-bug")
+    repo.create_head("feature")
+    monkeypatch.chdir(tmp_path)
+
+    assert completion.get_completions(cli, ["gg", "cl"], 1) == ["cleanup"]
+    assert "--configfile" in completion.get_completions(cli, ["gg", "--c"], 1)
+    # The value of an option isn't a command
+    assert completion.get_completions(cli, ["gg", "-c", "x", "gi"], 3) == ["github"]
+    assert completion.get_completions(cli, ["gg", "-c", "gi"], 2) == []
+    assert completion.get_completions(cli, ["gg", "github", "t"], 2) == [
+        "test",
+        "token",
+    ]
+    assert completion.get_completions(cli, ["gg", "cleanup", "f"], 2) == [
+        "feature",
+        "fix-bug",
+    ]
+    assert completion.get_completions(cli, ["gg", "start", "f"], 2) == []
+
+
+def test_complete_without_importing_git(tmp_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(gg.__file__)), env.get("PYTHONPATH", "")]
+    )
+    env.update(COMP_WORDS="gg clean", COMP_CWORD="1", _GG_COMPLETE="complete")
+    code = "import sys; from gg.main import cli; cli()"
+
+    def complete():
+        return subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=tmp_path,
+            env=env,
+            capture_output=True,
+            universal_newlines=True,
+        )
+
+    # The first time, every command has to be imported
+    assert complete().stdout == "cleanup\n"
+    process = complete()
+    assert process.stdout == "cleanup\n"
+    imported = [line.split("|")[-1].strip() for line in process.stderr.splitlines()]
+    assert "git" not in imported
+    assert "requests" not in imported
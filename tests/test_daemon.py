@@ -0,0 +1,62 @@
+import glob
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+import gg
+from gg import cache, daemon, state
+
+
+@pytest.mark.skipif(not daemon.is_supported(), reason="No Unix sockets")
+def test_client(tmp_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(gg.__file__)), env.get("PYTHONPATH", "")]
+    )
+
+    def ggd(*args):
+        return subprocess.run(
+            [sys.executable, "-c", "from gg.daemon import client; client()", *args],
+            cwd=tmp_path,
+            env=env,
+            capture_output=True,
+            timeout=30,
+        )
+
+    def get_daemon_pid():
+        (lock,) = glob.glob(os.path.join(cache.get_cache_dir(), "daemon-*.lock"))
+        with open(lock) as f:
+            return int(f.read())
+
+    result = ggd("--help")
+    pid = get_daemon_pid()
+    try:
+        assert result.returncode == 0
+        assert b"Commands:" in result.stdout
+
+        # Same daemon, and the exit code is passed on
+        result = ggd("no-such-command")
+        assert result.returncode == 2
+        assert b"No such command" in result.stderr
+        assert get_daemon_pid() == pid
+    finally:
+        os.kill(pid, signal.SIGTERM)
+
+
+def test_preload(tmp_path, mocker):
+    configfile = str(tmp_path / "gg.json")
+    state.write(configfile, {"FORK_NAME": "peterbe"})
+    state.preload(configfile)
+    loads = mocker.patch("json.load")
+    assert state.read(configfile)["FORK_NAME"] == "peterbe"
+    loads.assert_not_called()
+
+    # Only if it hasn't changed since
+    state.write(configfile, {"FORK_NAME": "someone"})
+    mocker.stopall()
+    state.preload(configfile)
+    state.write(configfile, {"FORK_NAME": "someone-else"})
+    assert state.read(configfile)["FORK_NAME"] == "someone-else"
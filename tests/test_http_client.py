@@ -0,0 +1,50 @@
+import json
+import os
+
+from gg import http_client
+
+
+def test_get(requestsmock, monkeypatch):
+    requestsmock.get("https://example.com/user", json={"login": "peterbe"})
+    response = http_client.get("https://example.com/user")
+    assert response.json() == {"login": "peterbe"}
+    assert requestsmock.last_request.timeout == http_client.DEFAULT_TIMEOUT
+
+    monkeypatch.setenv("GG_HTTP_TIMEOUT", "2.5")
+    http_client.get("https://example.com/user")
+    assert requestsmock.last_request.timeout == 2.5
+
+
+def test_get_session_shared():
+    session = http_client.get_session()
+    assert http_client.get_session() is session
+    adapter = session.get_adapter("https://api.github.com")
+    assert adapter.max_retries.total == http_client.RETRIES
+    assert 503 in adapter.max_retries.status_forcelist
+
+
+def test_cached_get_evicts_least_recently_used(requestsmock, monkeypatch):
+    for i in range(3):
+        requestsmock.get(
+            f"https://example.com/{i}", text="x" * 1000, headers={"ETag": f'"{i}"'}
+        )
+    monkeypatch.setattr(http_client, "CACHE_MAX_SIZE", 2500)
+    for i in range(3):
+        http_client.cached_get(f"https://example.com/{i}")
+        # Make sure they're not all used in the same instant
+        path = http_client.get_cache_path(f"https://example.com/{i}", {})
+        os.utime(path, (i, i))
+    http_client.cached_get("https://example.com/0")
+    urls = set()
+    for path, _, _ in http_client.get_cache_entries():
+        with open(path) as f:
+            urls.add(json.load(f)["url"])
+    assert urls == {"https://example.com/0", "https://example.com/2"}
+
+
+def test_cached_get_per_token(requestsmock):
+    requestsmock.get("https://example.com/user", json={}, headers={"ETag": '"a"'})
+    http_client.cached_get("https://example.com/user", headers={"Authorization": "1"})
+    http_client.cached_get("https://example.com/user", headers={"Authorization": "2"})
+    assert "If-None-Match" not in requestsmock.last_request.headers
+    assert len(http_client.get_cache_entries()) == 2
@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import time
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from gg.main import BUILTIN_COMMANDS, cli
+
+# Generous wall-clock budgets (in seconds) for starting a fresh interpreter
+# and getting as far as the command. Mostly here to catch someone putting
+# a heavy import back at the top of gg.main.
+HELP_BUDGET = 1.0
+COMMAND_BUDGET = 2.0
+
+
+def _run_python(code):
+    t0 = time.time()
+    res = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    return res.stdout, time.time() - t0
+
+
+def test_help_lists_all_builtins():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--help"])
+    assert result.exit_code == 0
+    for name in BUILTIN_COMMANDS:
+        assert name in result.output
+
+
+def test_builtin_short_help_in_sync():
+    ctx = click.Context(cli)
+    for name, (_, help) in BUILTIN_COMMANDS.items():
+        command = cli.get_command(ctx, name)
+        assert command is not None, name
+        assert command.get_short_help_str(45) == click.utils.make_default_short_help(
+            help, 45
+        )
+
+
+@pytest.mark.parametrize("command", [[], ["push"]])
+def test_startup_imports(command, tmp_path):
+    argv = ["-c", str(tmp_path / "gg.json")] + command + ["--help"]
+    code = (
+        "import sys\n"
+        "from gg.main import cli\n"
+        "try:\n"
+        f"    cli({argv!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sorted(sys.modules)))\n"
+    )
+    stdout, _ = _run_python(code)
+    modules = set(stdout.splitlines()[-1].split())
+    assert "requests" not in modules
+    assert "pkg_resources" not in modules
+    assert "gg.builtins.commit.gg_commit" not in modules
+    assert "gg.builtins.bugzilla" not in modules
+    if not command:
+        assert "git" not in modules
+    else:
+        assert "gg.builtins.push.gg_push" in modules
+
+
+def test_startup_budget(tmp_path):
+    _, took = _run_python("from gg.main import cli; cli(['--help'])")
+    assert took < HELP_BUDGET
+    configfile = str(tmp_path / "gg.json")
+    _, took = _run_python(
+        f"from gg.main import cli; cli(['-c', {configfile!r}, 'push', '--help'])"
+    )
+    assert took < COMMAND_BUDGET
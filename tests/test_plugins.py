@@ -0,0 +1,139 @@
+import sys
+
+import click
+import pytest
+
+from gg import plugins
+from gg.main import cli
+
+PLUGIN_SOURCE = '''
+from gg.main import cli
+
+
+@cli.command()
+def fake():
+    """A fake plugin command."""
+    print("Fake!")
+'''
+
+EXTENDING_PLUGIN_SOURCE = '''
+from gg.builtins.github import github
+
+
+@github.command()
+def extra():
+    """A fake extra github command."""
+    print("Extra!")
+'''
+
+
+class EntryPoint:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def load(self):
+        return plugins.import_object(self.value)
+
+
+def install_plugin(tmp_path, monkeypatch, module_name, source, value):
+    directory = tmp_path / "site-packages"
+    directory.mkdir()
+    (directory / f"{module_name}.py").write_text(source)
+    monkeypatch.syspath_prepend(str(directory))
+    # Otherwise the __pycache__ directory changes the mtime.
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    entry_points = [EntryPoint("cli", value)]
+    monkeypatch.setattr(plugins, "iter_entry_points", lambda: iter(entry_points))
+    return entry_points
+
+
+@pytest.fixture
+def fake_plugin(tmp_path, monkeypatch):
+    yield install_plugin(
+        tmp_path, monkeypatch, "gg_fakeplugin", PLUGIN_SOURCE, "gg_fakeplugin:fake"
+    )
+    cli.commands.pop("fake", None)
+    cli.lazy_commands.pop("fake", None)
+    cli._plugins_loaded = False
+    sys.modules.pop("gg_fakeplugin", None)
+
+
+def test_get_plugins(fake_plugin, monkeypatch):
+    found = plugins.get_plugins(cli)
+    assert found == [
+        {
+            "name": "cli",
+            "value": "gg_fakeplugin:fake",
+            "commands": {"fake": "A fake plugin command."},
+        }
+    ]
+    assert "fake" in cli.commands
+
+    # The second time, it should come from the index without scanning.
+    def iter_entry_points():
+        raise AssertionError("should not scan")
+
+    monkeypatch.setattr(plugins, "iter_entry_points", iter_entry_points)
+    assert plugins.get_plugins(cli) == found
+
+
+def test_get_plugins_index_invalidated(fake_plugin, monkeypatch):
+    plugins.get_plugins(cli)
+    fake_plugin.clear()
+    monkeypatch.setattr(plugins, "get_index_key", lambda: "something-new")
+    assert plugins.get_plugins(cli) == []
+
+
+def test_plugin_loaded_lazily(fake_plugin):
+    plugins.get_plugins(cli)
+    # Pretend this is a new process that only has the index.
+    del cli.commands["fake"]
+    del sys.modules["gg_fakeplugin"]
+    cli._plugins_loaded = False
+
+    ctx = click.Context(cli)
+    assert "fake" in cli.list_commands(ctx)
+    assert "gg_fakeplugin" not in sys.modules
+    command = cli.get_command(ctx, "fake")
+    assert command.name == "fake"
+    assert "gg_fakeplugin" in sys.modules
+
+
+@pytest.fixture
+def extending_plugin(tmp_path, monkeypatch):
+    # Like in a new process, where the builtin github command hasn't been
+    # imported yet
+    import gg.builtins.github
+
+    monkeypatch.delitem(cli.commands, "github", raising=False)
+    monkeypatch.delitem(sys.modules, "gg.builtins.github")
+    monkeypatch.delattr(gg.builtins, "github")
+    yield install_plugin(
+        tmp_path,
+        monkeypatch,
+        "gg_extendingplugin",
+        EXTENDING_PLUGIN_SOURCE,
+        "gg_extendingplugin:extra",
+    )
+    cli._plugins_loaded = False
+    sys.modules.pop("gg_extendingplugin", None)
+
+
+def test_plugin_extending_builtin_group(extending_plugin, monkeypatch):
+    # The builtin github group isn't the plugin's command
+    found = plugins.get_plugins(cli)
+    assert found == [
+        {"name": "cli", "value": "gg_extendingplugin:extra", "commands": {}}
+    ]
+    github = sys.modules["gg.builtins.github"].github
+
+    # Pretend this is a new process that only has the index, twice
+    monkeypatch.setattr(plugins, "iter_entry_points", lambda: iter([]))
+    for _ in range(2):
+        del github.commands["extra"]
+        del sys.modules["gg_extendingplugin"]
+        cli._plugins_loaded = False
+        assert plugins.get_plugins(cli) == found
+        cli.load_plugins()
+        assert "extra" in github.commands
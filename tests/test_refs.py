@@ -0,0 +1,148 @@
+import datetime
+
+import git
+
+from gg import refs
+
+
+def test_parse_raw_date():
+    date = refs.parse_raw_date("1600000000 -0530")
+    assert date.utcoffset() == -datetime.timedelta(hours=5, minutes=30)
+    assert date.timestamp() == 1600000000
+
+
+def test_for_each_ref(tmp_path):
+    repo = git.Repo.init(tmp_path)
+    repo.index.commit(
+        "Older\n\nWith a body",
+        commit_date="1577829600 +0200",
+    )
+    repo.create_head("older")
+    repo.index.commit("Newer", commit_date="1609466400 -0200")
+    repo.create_head("newer")
+    repo.git.tag("-a", "annotated", "-m", "A tag")
+
+    found = list(refs.for_each_ref(repo, "refs/heads", "refs/tags"))
+    names = [ref["refname"] for ref in found]
+    assert names.index("refs/heads/newer") < names.index("refs/heads/older")
+    assert "refs/tags/annotated" not in names
+    (older,) = [ref for ref in found if ref["refname"] == "refs/heads/older"]
+    assert older["subject"] == "Older"
+    assert older["upstream"] == ""
+    assert older["date"].isoformat() == "2020-01-01T00:00:00+02:00"
+
+
+def test_merged_and_squashed_branches(tmp_path, mocker):
+    repo = git.Repo.init(tmp_path)
+    repo.index.commit("first")
+    main = repo.create_head("trunk")
+
+    def commit_on(branch, filename, text):
+        repo.head.reference = branch
+        repo.head.reset(index=True, working_tree=True)
+        (tmp_path / filename).write_text(text)
+        repo.index.add([filename])
+        repo.index.commit(f"Add {filename}")
+
+    merged = repo.create_head("merged")
+    commit_on(merged, "merged.txt", "merged")
+    squashed = repo.create_head("squashed", main.commit)
+    commit_on(squashed, "a.txt", "a")
+    commit_on(squashed, "b.txt", "b")
+    rebased = repo.create_head("rebased", main.commit)
+    commit_on(rebased, "c.txt", "c")
+    unmerged = repo.create_head("unmerged", main.commit)
+    commit_on(unmerged, "d.txt", "d")
+
+    repo.head.reference = main
+    repo.head.reset(index=True, working_tree=True)
+    repo.git.merge("merged")
+    repo.git.merge("--squash", "squashed")
+    repo.index.commit("Squashed")
+    repo.git.cherry_pick("rebased")
+
+    names = ["squashed", "rebased", "unmerged"]
+    merged_names = refs.get_merged_branches(repo, "trunk")
+    assert {"merged", "trunk"} <= merged_names
+    assert not merged_names & set(names)
+    assert refs.get_squashed_branches(repo, "trunk", names) == {"squashed", "rebased"}
+
+    # The second time, it's all from the cache
+    is_squashed = mocker.patch("gg.refs.is_squashed")
+    assert refs.get_squashed_branches(repo, "trunk", names) == {"squashed", "rebased"}
+    is_squashed.assert_not_called()
+
+
+def test_is_squashed_with_color_always(tmp_path):
+    repo = git.Repo.init(tmp_path)
+    repo.index.commit("first")
+    trunk = repo.create_head("trunk")
+    topic = repo.create_head("topic")
+    repo.head.reference = topic
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text(name)
+        repo.index.add([name])
+        repo.index.commit(f"Add {name}")
+    repo.head.reference = trunk
+    repo.head.reset(index=True, working_tree=True)
+    repo.git.merge("--squash", "topic")
+    repo.index.commit("Squashed")
+
+    # Colors in the diffs would make every patch-id different
+    with repo.config_writer() as config:
+        config.set_value("color", "ui", "always")
+    assert refs.is_squashed(repo, "trunk", topic.commit.hexsha)
+
+
+def test_search():
+    names = ["fix-the-bug", "bugfix", "feature/big-ui", "main"]
+    assert refs.search(names, "") == [0, 1, 2, 3]
+    assert refs.search(names, "BUG") == [1, 0]
+    assert refs.search(names, "bugfix", exact=True) == [1]
+    assert refs.search(names, "fbu") == []
+    # Matching the start of words is better
+    assert refs.search(names, "ftb", fuzzy=True) == [0, 2]
+
+
+def test_get_branch_index(tmp_path, mocker):
+    repo = git.Repo.init(tmp_path)
+    repo.index.commit("Older", commit_date="1577829600 +0200")
+    repo.create_head("older")
+    repo.index.commit("Newer", commit_date="1609466400 -0200")
+    repo.create_head("feature/newer")
+
+    index = refs.get_branch_index(repo)
+    names = [name for _, name, _ in index]
+    assert names.index("feature/newer") < names.index("older")
+
+    # Unchanged refs, so it comes from the cache
+    for_each_ref = mocker.patch("gg.refs.for_each_ref")
+    assert refs.get_branch_index(repo) == index
+    for_each_ref.assert_not_called()
+    mocker.stopall()
+
+    repo.create_head("feature/newest")
+    assert "feature/newest" in [name for _, name, _ in refs.get_branch_index(repo)]
+
+
+def test_fast_forward(tmp_path):
+    upstream = git.Repo.init(tmp_path / "upstream")
+    upstream.index.commit("first")
+    upstream.git.branch("-M", "trunk")
+    repo = git.Repo.clone_from(str(tmp_path / "upstream"), tmp_path / "clone")
+    repo.create_head("topic").checkout()
+    upstream.index.commit("second")
+
+    assert refs.fast_forward(repo, "origin", "trunk")
+    assert repo.heads.trunk.commit == upstream.head.commit
+    assert repo.active_branch.name == "topic"
+
+    # Diverged, so it's left alone, but origin/trunk is still updated
+    repo.heads.trunk.checkout()
+    repo.index.commit("local")
+    local = repo.head.commit
+    repo.heads.topic.checkout()
+    upstream.index.commit("third")
+    assert not refs.fast_forward(repo, "origin", "trunk")
+    assert repo.heads.trunk.commit == local
+    assert repo.remotes.origin.refs.trunk.commit == upstream.head.commit
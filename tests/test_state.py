@@ -1,6 +1,13 @@
 import json
+import multiprocessing
+import os
+import sqlite3
+
+import click
+import pytest
 
 from gg import state
+from gg.main import Config
 
 
 def test_save(temp_configfile):
@@ -37,3 +44,109 @@ def test_load(temp_configfile):
     assert saved["description"] == "My description"
     assert saved["foo"] == "bar"
     assert saved["date"]
+
+
+def test_read_modify_write(temp_configfile):
+    # What plugins have always done
+    state.write(temp_configfile, {"any": "thing"})
+    data = state.read(temp_configfile)
+    data["other"] = "stuff"
+    state.write(temp_configfile, data)
+    with open(temp_configfile) as f:
+        assert json.load(f) == {"any": "thing", "other": "stuff"}
+
+    config = Config()
+    config.configfile = temp_configfile
+    with click.Context(click.Command("test"), obj=config):
+        data = state.read(temp_configfile)
+        del data["any"]
+        state.write(temp_configfile, data)
+    with open(temp_configfile) as f:
+        assert json.load(f) == {"other": "stuff"}
+
+
+def test_session(temp_configfile, mocker):
+    state.write(temp_configfile, {"FORK_NAME": "peterbe", "gg:branch": {}})
+    json_load = mocker.spy(state.json, "load")
+    config = Config()
+    config.configfile = temp_configfile
+    with click.Context(click.Command("test"), obj=config):
+        assert state.read(temp_configfile)["FORK_NAME"] == "peterbe"
+        state.update(temp_configfile, {"any": "thing"})
+        state.update_config(temp_configfile, foo="bar")
+        state.remove(temp_configfile, "gg:branch")
+        assert state.read(temp_configfile)["any"] == "thing"
+        assert state.load_config(temp_configfile, "foo") == "bar"
+        assert json_load.call_count == 1
+
+        # Nothing written yet
+        with open(temp_configfile) as f:
+            assert json.load(f) == {"FORK_NAME": "peterbe", "gg:branch": {}}
+
+    assert not config.state_sessions
+    with open(temp_configfile) as f:
+        saved = json.load(f)
+    key = f"{os.path.basename(config.repo.working_dir)}:_config:foo"
+    assert saved == {"FORK_NAME": "peterbe", "any": "thing", key: "bar"}
+
+
+def test_sqlite(tmp_path):
+    configfile = str(tmp_path / "gg.sqlite3")
+    state.create(configfile)
+    state.update(configfile, {"any": "thing", "other": "stuff"})
+    state.save(configfile, "My description", "branch-name", foo="bar")
+    state.update_config(configfile, push_to_origin=True)
+    state.remove(configfile, "other")
+
+    saved = state.load(configfile, "branch-name")
+    assert saved["description"] == "My description"
+    assert saved["foo"] == "bar"
+    assert state.load_config(configfile, "push_to_origin") is True
+    everything = state.read(configfile)
+    assert everything["any"] == "thing"
+    assert "other" not in everything
+    assert len(everything) == 3
+
+    connection = sqlite3.connect(configfile)
+    ((repo, branch),) = connection.execute("SELECT repo, branch FROM branches")
+    assert branch == "branch-name"
+    ((key, value),) = connection.execute("SELECT key, value FROM repo_config")
+    assert (key, value) == ("push_to_origin", "true")
+
+
+def test_sqlite_migrates_json(tmp_path):
+    with open(tmp_path / "gg.json", "w") as f:
+        json.dump({"FORK_NAME": "peterbe", "gg:some-branch": {"bugnumber": 1}}, f)
+    configfile = str(tmp_path / "gg.sqlite3")
+    state.create(configfile)
+    assert dict(state.read(configfile)) == {
+        "FORK_NAME": "peterbe",
+        "gg:some-branch": {"bugnumber": 1},
+    }
+
+
+def _write_many(configfile, worker, count):
+    for i in range(count):
+        state.update(configfile, {f"worker-{worker}-{i}": i, "last": worker})
+
+
+@pytest.mark.parametrize("filename", ["gg.json", "gg.sqlite3"])
+def test_parallel_writers(tmp_path, filename):
+    configfile = str(tmp_path / filename)
+    state.create(configfile)
+    workers, count = 16, 20
+    processes = [
+        multiprocessing.Process(target=_write_many, args=(configfile, worker, count))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    saved = dict(state.read(configfile))
+    assert len(saved) == workers * count + 1
+    for worker in range(workers):
+        for i in range(count):
+            assert saved[f"worker-{worker}-{i}"] == i
@@ -0,0 +1,108 @@
+import os
+import time
+
+import git
+import pytest
+
+from gg import status
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = git.Repo.init(tmp_path)
+    (tmp_path / ".gitignore").write_text("ignored/\n")
+    repo.index.add([".gitignore"])
+    repo.index.commit("first")
+    return repo
+
+
+def test_get_untracked(repo, tmp_path):
+    (tmp_path / "new.txt").write_text("new")
+    (tmp_path / "node_modules" / "deep" / "er").mkdir(parents=True)
+    for i in range(100):
+        (tmp_path / "node_modules" / "deep" / "er" / f"{i}.js").write_text("")
+    (tmp_path / "ignored").mkdir()
+    (tmp_path / "ignored" / "file.txt").write_text("")
+
+    assert sorted(status.Status(repo).untracked) == ["new.txt", "node_modules/"]
+    assert not status.Status(repo).dirty
+    assert status.Status(repo, untracked_files="no").untracked == []
+
+
+def test_status(repo, tmp_path):
+    for name in ("modified.txt", "deleted.txt", "renamed.txt", "both.txt"):
+        (tmp_path / name).write_text("original")
+    repo.index.add(["modified.txt", "deleted.txt", "renamed.txt", "both.txt"])
+    repo.index.commit("second")
+    (tmp_path / "modified.txt").write_text("modified")
+    (tmp_path / "deleted.txt").unlink()
+    repo.git.mv("renamed.txt", "new name.txt")
+    (tmp_path / "both.txt").write_text("staged")
+    repo.index.add(["both.txt"])
+    (tmp_path / "both.txt").write_text("and modified")
+    (tmp_path / "untracked.txt").write_text("new")
+
+    snapshot = status.Status(repo)
+    assert snapshot.dirty
+    assert sorted(snapshot.staged) == ["both.txt", "new name.txt"]
+    assert sorted(snapshot.modified) == ["both.txt", "modified.txt"]
+    assert snapshot.deleted == ["deleted.txt"]
+    assert snapshot.untracked == ["untracked.txt"]
+    assert sorted(snapshot.changed) == [
+        "both.txt",
+        "deleted.txt",
+        "modified.txt",
+        "new name.txt",
+    ]
+
+
+def test_get_ages(repo, tmp_path):
+    (tmp_path / "old.txt").write_text("old")
+    os.utime(tmp_path / "old.txt", (time.time() - 3600, time.time() - 3600))
+    (tmp_path / "build" / "sub").mkdir(parents=True)
+    (tmp_path / "build" / "sub" / "young.txt").write_text("young")
+    for path in (tmp_path / "build", tmp_path / "build" / "sub"):
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+    ages = status.get_ages(str(tmp_path), ["old.txt", "build/", "gone.txt"])
+    assert set(ages) == {"old.txt", "build/"}
+    assert 3500 < ages["old.txt"] < 3700
+    # The youngest file in it
+    assert ages["build/"] < 60
+
+    # Out of time, so only the directory itself
+    ages = status.get_ages(str(tmp_path), ["build/"], budget=0)
+    assert ages["build/"] > 7000
+
+
+def test_status_without_renames(repo, tmp_path):
+    repo.git.mv(".gitignore", "renamed")
+    assert sorted(status.Status(repo).staged) == ["renamed"]
+    snapshot = status.Status(repo, untracked_files="no", renames=False)
+    assert sorted(snapshot.staged) == [".gitignore", "renamed"]
+
+
+def test_speedups(repo, mocker):
+    assert status.get_speedups(repo) == {
+        "core.fsmonitor": None,
+        "core.untrackedCache": None,
+    }
+    mocker.patch("shutil.which").return_value = None
+    speedups = status.enable_speedups(repo)
+    assert speedups["core.untrackedCache"] == "true"
+    assert speedups == status.get_speedups(repo)
+    # Still works, with or without a file system monitor
+    assert not status.Status(repo).dirty
+
+
+def test_speedups_old_git(repo, mocker):
+    # Where `git fsmonitor--daemon` isn't a command, which exits with 1 too
+    mocker.patch.object(
+        type(repo.git), "version_info", mocker.PropertyMock(return_value=(2, 35, 1))
+    )
+    execute = mocker.spy(type(repo.git), "execute")
+    mocker.patch("shutil.which").return_value = None
+    speedups = status.enable_speedups(repo)
+    assert speedups["core.fsmonitor"] is None
+    for (_, command, *_), _ in execute.call_args_list:
+        assert "fsmonitor--daemon" not in command
@@ -0,0 +1,44 @@
+import json
+import subprocess
+
+import git
+
+from gg import trace
+
+
+def test_trace(tmp_path, capsys, requestsmock):
+    requestsmock.get("https://example.com/user", json={})
+    repo = git.Repo.init(tmp_path)
+
+    @trace.traced()
+    def something():
+        repo.git.status()
+        subprocess.run(["git", "--version"], capture_output=True)
+
+    something()  # not traced
+    trace_file = tmp_path / "trace.json"
+    trace.start(trace_file=str(trace_file), profile_file=str(tmp_path / "prof"))
+    something()
+    with trace.span("fetching", "http"):
+        import requests
+
+        requests.get("https://example.com/user?q=1")
+    trace.stop()
+    something()  # not traced again
+
+    summary = capsys.readouterr().err
+    assert "git status" in summary
+    assert "git --version" not in summary
+    assert "test_trace.<locals>.something" in summary
+    assert "GET https://example.com/user\n" in summary
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    assert sorted(event["name"] for event in events) == [
+        "GET https://example.com/user",
+        "fetching",
+        "git",
+        "git status",
+        "test_trace.<locals>.something",
+    ]
+    (request,) = [event for event in events if event["name"].startswith("GET")]
+    assert request["args"]["details"] == "https://example.com/user?q=1"
+    assert (tmp_path / "prof").exists()
@@ -1,4 +1,7 @@
+import os
+import subprocess
 import tempfile
+import time
 
 import click
 import pytest
@@ -7,6 +10,29 @@ import git
 from gg import utils
 
 
+@pytest.fixture
+def cloned_repo(tmp_path):
+    def run(*args, cwd=tmp_path):
+        subprocess.run(["git"] + list(args), cwd=cwd, check=True, capture_output=True)
+
+    run("init", "--bare", "origin.git")
+    run("clone", "origin.git", "clone")
+    clone = tmp_path / "clone"
+    run(
+        "-c",
+        "user.name=X",
+        "-c",
+        "user.email=x@example.com",
+        "commit",
+        "--allow-empty",
+        "-m",
+        "first",
+        cwd=clone,
+    )
+    run("push", "origin", "HEAD:refs/heads/trunk", cwd=clone)
+    return git.Repo(clone)
+
+
 def test_get_repo(mocker):
     this_repo = utils.get_repo()
     assert isinstance(this_repo, git.Repo)
@@ -17,11 +43,46 @@ def test_get_repo_never_found(mocker):
         utils.get_repo(tempfile.gettempdir())
 
 
+def test_get_repo_parent_directory(cloned_repo):
+    subdirectory = os.path.join(cloned_repo.working_dir, "sub", "directory")
+    os.makedirs(subdirectory)
+    repo = utils.get_repo(subdirectory)
+    assert repo.working_dir == cloned_repo.working_dir
+
+
+def test_get_repo_worktree(cloned_repo, tmp_path):
+    worktree = str(tmp_path / "worktree")
+    cloned_repo.git.worktree("add", "-b", "other", worktree)
+    # A worktree has a .git file, not a .git directory
+    assert os.path.isfile(os.path.join(worktree, ".git"))
+    repo = utils.get_repo(worktree)
+    assert repo.working_dir == worktree
+    assert repo.active_branch.name == "other"
+
+
+def test_get_repo_git_dir(cloned_repo, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_DIR", cloned_repo.git_dir)
+    repo = utils.get_repo()
+    assert repo.git_dir == cloned_repo.git_dir
+
+
 def test_get_repo_name():
     this_repo_name = utils.get_repo_name()
     assert this_repo_name == "gg"
 
 
+def test_get_repo_name_current_repo(mocker):
+    repo = mocker.MagicMock()
+    repo.working_dir = "/some/where/myrepo"
+    obj = mocker.MagicMock()
+    obj.repo = repo
+    get_repo = mocker.patch("gg.utils.get_repo")
+    with click.Context(click.Command("test"), obj=obj):
+        assert utils.get_repo_name() == "myrepo"
+    get_repo.assert_not_called()
+
+
 def test_error_out(capsys):
     with pytest.raises(click.Abort):
         utils.error_out("Blarg")
@@ -69,3 +130,49 @@ def test_is_bugzilla():
         "url": "https://bugzilla.mozilla.org/show_bug.cgi?id=12345678",
     }
     assert not utils.is_bugzilla(not_good_data)
+
+
+def test_get_default_branch_locally(cloned_repo, mocker):
+    remote_default_branch = mocker.patch("gg.utils.get_remote_default_branch")
+    cloned_repo.git.remote("set-head", "origin", "trunk")
+    assert utils.get_default_branch(cloned_repo, "origin") == "trunk"
+    # What's configured wins over what was set when it was cloned
+    assert utils.get_default_branch(cloned_repo, "origin", "other") == "other"
+    remote_default_branch.assert_not_called()
+
+
+def test_get_default_branch_configured(cloned_repo, mocker):
+    remote_default_branch = mocker.patch("gg.utils.get_remote_default_branch")
+    assert utils.get_default_branch(cloned_repo, "origin", "develop") == "develop"
+    remote_default_branch.assert_not_called()
+
+
+def test_get_default_branch_cached(cloned_repo, mocker):
+    remote_default_branch = mocker.patch("gg.utils.get_remote_default_branch")
+    remote_default_branch.return_value = "trunk"
+    assert utils.get_default_branch(cloned_repo, "origin") == "trunk"
+    assert utils.get_default_branch(cloned_repo, "origin") == "trunk"
+    assert remote_default_branch.call_count == 1
+
+    # Unless it's too old
+    mocker.patch("time.time").return_value = (
+        time.time() + utils.DEFAULT_BRANCH_CACHE_TTL + 1
+    )
+    assert utils.get_default_branch(cloned_repo, "origin") == "trunk"
+    assert remote_default_branch.call_count == 2
+
+
+def test_get_default_branch_refresh(cloned_repo):
+    cloned_repo.git.remote("set-head", "origin", "trunk")
+    cloned_repo.git.push("origin", "HEAD:refs/heads/main")
+    cloned_repo.remotes.origin.fetch()
+    # Now pretend the default branch on the remote was changed
+    cloned_repo.git.remote("set-head", "origin", "main")
+    assert utils.get_default_branch(cloned_repo, "origin") == "main"
+
+    # The bare repo (i.e. the remote) still says 'trunk' (or whatever
+    # `git init` picked as its initial branch).
+    remote = git.Repo(cloned_repo.remotes.origin.url)
+    remote.git.symbolic_ref("HEAD", "refs/heads/trunk")
+    assert utils.get_default_branch(cloned_repo, "origin", refresh=True) == "trunk"
+    assert utils.get_default_branch(cloned_repo, "origin") == "trunk"